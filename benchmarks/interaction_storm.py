@@ -0,0 +1,389 @@
+"""Offline interaction storm against the giveaway and glass bridge views
+
+Fake members, channels, messages and interactions drive the real button
+handlers concurrently, the way the gateway dispatches every interaction
+as its own task. Arrivals are open loop: each event has a scheduled
+arrival time and its latency is measured from that time, so a handler
+that stalls the loop shows up in the latency of everything queued
+behind it.
+
+Run from the repository root:
+    python -m benchmarks.interaction_storm [--clicks 20000] [--duration 10]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import re
+import statistics
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List
+
+import discord
+
+from bot.data.minigames import BridgeGameSettings
+from bot.models.giveaway import GiveawayView
+from bot.models.minigames import BridgeGameView
+from bot.utils.database import BatchWriter, close_connection, connection
+from bot.utils.edits import EDITS
+from bot.utils.minigames import RENDERER
+from bot.utils.minigames.events import GAME_LOG
+
+GUILD_ID = 1
+CHANNEL_ID = 2
+ROLE_ID = 3
+
+
+@dataclass(frozen=True)
+class _User:
+    """What Member forwards its user attributes to"""
+
+    id: int  # pylint: disable=invalid-name
+    name: str
+    bot: bool = False
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeMember(discord.Member):
+    """A Member that holds its roles as ids and records role changes"""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, user_id: int, role_ids: set[int]) -> None:
+        self._user = _User(user_id, f"member{user_id}")  # type: ignore
+        self.role_ids = role_ids
+        self.added_roles = 0
+
+    @property
+    def roles(self):  # type: ignore
+        # role ids are not Role objects, the index starts out empty
+        return []
+
+    def get_role(self, role_id: int, /):
+        return discord.Object(role_id) if role_id in self.role_ids else None  # type: ignore
+
+    async def add_roles(self, *roles, **_):  # type: ignore
+        self.added_roles += len(roles)
+        self.role_ids.update(role.id for role in roles)
+
+
+class FakeGuild:
+    """The member cache the role index and the bulk role engine read"""
+
+    def __init__(self, members: List[FakeMember]) -> None:
+        self.id = GUILD_ID  # pylint: disable=invalid-name
+        self.members = members
+        self.by_id = {member.id: member for member in members}
+
+    def get_member(self, member_id: int):
+        return self.by_id.get(member_id)
+
+
+class FakeRole(discord.Role):
+    """A role that knows its guild, which is all the bulk role engine needs"""
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, guild: FakeGuild) -> None:
+        self.id = ROLE_ID
+        self.name = "loser"
+        self.guild = guild  # type: ignore
+
+    def is_default(self):
+        return False
+
+
+class Recorder:
+    """Every call the handlers make towards discord, with a fake round trip"""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self.responses: Counter[str] = Counter()
+        self.next_id = 10_000
+
+    async def call(self, name: str):
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def snowflake(self):
+        self.next_id += 1
+        return self.next_id
+
+
+class FakeMessage:
+    def __init__(self, recorder: Recorder, embeds: List[discord.Embed]) -> None:
+        self.recorder = recorder
+        self.id = recorder.snowflake()  # pylint: disable=invalid-name
+        self.guild = discord.Object(GUILD_ID)
+        self.channel = discord.Object(CHANNEL_ID)
+        self.embeds = embeds
+
+    async def edit(self, **_):
+        await self.recorder.call("message.edit")
+        return self
+
+    async def reply(self, *_, **kwargs):
+        await self.recorder.call("message.reply")
+        return FakeMessage(self.recorder, [kwargs["embed"]] if "embed" in kwargs else [])
+
+
+class FakeTextChannel(discord.TextChannel):
+    # pylint: disable=super-init-not-called
+    def __init__(self, recorder: Recorder) -> None:
+        self.id = CHANNEL_ID
+        self.recorder = recorder
+
+    async def send(self, *_, **kwargs):  # type: ignore
+        await self.recorder.call("channel.send")
+        return FakeMessage(self.recorder, [kwargs["embed"]] if "embed" in kwargs else [])
+
+
+class RecordingResponse:
+    """InteractionResponse that only remembers what it was asked to send"""
+
+    def __init__(self, recorder: Recorder) -> None:
+        self.recorder = recorder
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def send_message(self, content: str | None = None, **_):
+        if self.done:
+            raise discord.InteractionResponded(None)  # type: ignore
+        self.done = True
+        # member names vary, count by message shape
+        self.recorder.responses[re.sub(r"\d+", "#", content or "")] += 1
+        await self.recorder.call("response.send_message")
+
+    async def defer(self, **_):
+        self.done = True
+        await self.recorder.call("response.defer")
+
+
+class FakeInteraction:
+    def __init__(self, recorder: Recorder, user: FakeMember, channel) -> None:
+        self.user = user
+        self.channel = channel
+        self.response = RecordingResponse(recorder)
+
+
+@dataclass
+class Scenario:
+    name: str
+    events: int
+    handler: Callable[[int], Awaitable[Any]]
+    latencies: List[float] = field(default_factory=list)
+    errors: Counter[str] = field(default_factory=Counter)
+    first: float = 0.0
+    last: float = 0.0
+
+    async def _one(self, index: int, arrival: float):
+        try:
+            await self.handler(index)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.errors[type(exc).__name__] += 1
+        end = time.perf_counter()
+        self.latencies.append(end - arrival)
+        self.last = max(self.last, end)
+
+    async def drive(self, duration: float):
+        """Dispatch every event as its own task at its arrival time"""
+        tasks = []
+        self.first = start = time.perf_counter()
+        for index in range(self.events):
+            arrival = start + duration * index / self.events
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self._one(index, arrival)))
+        await asyncio.gather(*tasks)
+
+    def report(self):
+        if not self.latencies:
+            return f"{self.name:>14}: no events"
+        ordered = sorted(self.latencies)
+        p50 = ordered[len(ordered) // 2]
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        throughput = len(ordered) / max(self.last - self.first, 1e-9)
+        errors = f"  errors {dict(self.errors)}" if self.errors else ""
+        return (
+            f"{self.name:>14}: {len(ordered):7} events {throughput:9.0f}/s  "
+            + f"p50 {p50 * 1e3:8.2f}ms  p99 {p99 * 1e3:8.2f}ms  "
+            + f"max {ordered[-1] * 1e3:8.2f}ms{errors}"
+        )
+
+
+class LagSampler:
+    """How late a periodic sleep wakes up, i.e. how long the loop was blocked"""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.lags: List[float] = []
+        self.running = True
+
+    async def run(self):
+        while self.running:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(time.perf_counter() - start - self.interval)
+
+    def report(self):
+        if not self.lags:
+            return "loop lag: no samples"
+        ordered = sorted(self.lags)
+        return (
+            f"{'loop lag':>14}: {len(ordered):7} samples  "
+            + f"p50 {statistics.median(ordered) * 1e3:.2f}ms  "
+            + f"p99 {ordered[int(len(ordered) * 0.99)] * 1e3:.2f}ms  "
+            + f"max {ordered[-1] * 1e3:.2f}ms"
+        )
+
+
+async def giveaway_scenario(args, recorder: Recorder, rng: random.Random):
+    deadline = datetime.now() + timedelta(hours=1)
+    role = discord.Object(ROLE_ID) if args.role else None
+    view = GiveawayView(None, 10, role, deadline)  # type: ignore
+    view.message = FakeMessage(recorder, [discord.Embed(title="Giveaway")])  # type: ignore
+    await view.save()
+    # every tenth member misses the required role
+    members = [
+        FakeMember(user_id, set() if user_id % 10 == 0 else {ROLE_ID})
+        for user_id in range(100_000, 100_000 + args.members)
+    ]
+    channel = FakeTextChannel(recorder)
+
+    async def click(_: int):
+        interaction = FakeInteraction(recorder, rng.choice(members), channel)
+        await view.participate.callback(interaction)  # type: ignore
+
+    return view, Scenario("participate", args.clicks, click)
+
+
+async def bridge_scenarios(args, recorder: Recorder, rng: random.Random):
+    members = [FakeMember(user_id, set()) for user_id in range(1, args.players + 1)]
+    players: List[discord.Member] = list(members)
+    channel = FakeTextChannel(recorder)
+    settings = BridgeGameSettings(
+        CHANNEL_ID,
+        True,
+        None,
+        players[0],
+        args.segments,
+        players[1:],
+        list(players),
+        panels=args.panels,
+        loser_role=FakeRole(FakeGuild(members)),
+    )
+    settings.move_segments()
+    deadline = datetime.now() + timedelta(hours=1)
+    view = BridgeGameView(None, settings, players[0], channel, deadline)  # type: ignore
+    file, embed = await settings.generate_image()
+    view.msg = await channel.send(file=file, embed=embed, view=view)
+
+    def presser():
+        # the player whose turn it is clicks too, everyone else mashes
+        if rng.random() < args.turn_share:
+            return settings.turn
+        return rng.choice(players)
+
+    async def press(_: int):
+        button = view.childs[rng.randrange(settings.panels)]
+        await button.callback(FakeInteraction(recorder, presser(), channel))  # type: ignore
+
+    async def switch(_: int):
+        await view.check_switch(FakeInteraction(recorder, presser(), channel))  # type: ignore
+
+    return view, [
+        Scenario("bridge button", args.presses, press),
+        Scenario("switch", args.switches, switch),
+    ]
+
+
+async def storm(args):
+    recorder = Recorder(args.latency / 1e3)
+    rng = random.Random(args.seed)
+    giveaway, participate = await giveaway_scenario(args, recorder, rng)
+    bridge, (press, switch) = await bridge_scenarios(args, recorder, rng)
+    if args.warm:
+        await RENDERER.warm(args.panels)
+    sampler = LagSampler()
+    lag_task = asyncio.create_task(sampler.run())
+    started = time.perf_counter()
+    scenarios = (participate, press, switch)
+    await asyncio.gather(*(scenario.drive(args.duration) for scenario in scenarios))
+    elapsed = time.perf_counter() - started
+    sampler.running = False
+    await lag_task
+
+    total = sum(len(scenario.latencies) for scenario in scenarios)
+    print(
+        f"{total} interactions in {elapsed:.2f}s ({total / elapsed:.0f}/s), "
+        + f"simulated round trip {args.latency:g}ms"
+    )
+    for scenario in scenarios:
+        print(scenario.report())
+    print(sampler.report())
+    print(
+        f"participants {len(giveaway.participants)}, bridge segment "
+        + f"{bridge.settings.segment}, players left {len(bridge.settings.players)}"
+    )
+    print("discord calls:", dict(recorder.calls))
+    print("responses:", dict(recorder.responses.most_common()))
+    print("coalesced edits:", EDITS.stats())
+    await BatchWriter.flush_all()
+    print("rows written:", sum(writer.rows for writer in BatchWriter.instances))
+    print("game events:", GAME_LOG.records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=20_000, help="participate clicks")
+    parser.add_argument("--members", type=int, default=15_000, help="distinct clickers")
+    parser.add_argument("--role", action="store_true", help="require a role")
+    parser.add_argument("--presses", type=int, default=2_000, help="bridge clicks")
+    parser.add_argument("--switches", type=int, default=500, help="switch clicks")
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--panels", type=int, default=4)
+    parser.add_argument("--segments", type=int, default=1_000)
+    parser.add_argument(
+        "--turn-share", type=float, default=0.2, help="share of clicks by the turn"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="seconds to spread arrivals over"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="fake discord round trip in ms"
+    )
+    parser.add_argument("--warm", action="store_true", help="prerender boards")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--logs", action="store_true", help="keep info logs")
+    args = parser.parse_args()
+    if not args.logs:
+        logging.disable(logging.INFO)
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            connection.DATABASE_PATH = Path(tmp) / "storm.db"
+            GAME_LOG.path = Path(tmp) / "storm.evlog"
+            try:
+                await storm(args)
+            finally:
+                GAME_LOG.close()
+                await close_connection()
+                RENDERER.shutdown()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Per-click and draw cost of giveaway participant storage
+
+Run from the repository root:
+    python -m benchmarks.participants [entries]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import timeit
+
+from bot.models.giveaway.participants import ParticipantRegistry, WinnerDraw
+
+
+class _Member:
+    """Stands in for discord.Member, which compares by id through __eq__"""
+
+    __slots__ = ("id",)
+
+    def __init__(self, user_id: int) -> None:
+        self.id = user_id  # pylint: disable=invalid-name
+
+    def __eq__(self, other: object):
+        return isinstance(other, _Member) and other.id == self.id
+
+
+def bench_list(entries: int, clicks: int, winners: int):
+    members = [_Member(idx) for idx in range(entries)]
+    newcomer = _Member(entries + 1)
+
+    def click():
+        # the old participate: O(n) scan of Member objects
+        if newcomer not in members:
+            pass
+
+    def draw():
+        pool = list(members)
+        random.shuffle(pool)
+        return [pool.pop(random.randrange(len(pool))) for _ in range(winners)]
+
+    return (
+        timeit.timeit(click, number=clicks) / clicks,
+        timeit.timeit(draw, number=5) / 5,
+    )
+
+
+def bench_registry(entries: int, clicks: int, winners: int):
+    registry = ParticipantRegistry(range(entries))
+    newcomers = iter(range(entries, entries + clicks))
+
+    def click():
+        registry.add(next(newcomers))
+
+    def draw():
+        # what the bot runs when a giveaway ends: permute once, take the winners
+        return WinnerDraw(registry, random.getrandbits(63)).take(winners)
+
+    # drawn before the clicks grow the registry past `entries`
+    drawn = timeit.timeit(draw, number=5) / 5
+    return timeit.timeit(click, number=clicks) / clicks, drawn
+
+
+def main(entries: int = 100_000):
+    print(f"{entries} entries")
+    for name, bench, clicks in (
+        ("list[Member]", bench_list, 200),
+        ("ParticipantRegistry", bench_registry, 100_000),
+    ):
+        click, draw = bench(entries, clicks, 10)
+        print(f"{name:>20}: click {click * 1e6:10.2f}us  draw {draw * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
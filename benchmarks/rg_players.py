@@ -0,0 +1,77 @@
+"""Memory and reset cost of the red/green player table
+
+Run from the repository root:
+    python -m benchmarks.rg_players [players]
+"""
+from __future__ import annotations
+
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from bot.models.minigames import RGPlayerTable
+
+
+class _Member:
+    """Stands in for the cached discord.Member both layouts point at"""
+
+    __slots__ = ("id",)
+
+    def __init__(self, user_id: int) -> None:
+        self.id = user_id  # pylint: disable=invalid-name
+
+
+@dataclass
+class _PlayerData:
+    """The former per-player dataclass"""
+
+    author: _Member
+    correct: int = 0
+    answered: bool = False
+    last_wrong: datetime | None = None
+    last_answer: str = ""
+    afk_counter: datetime = field(default_factory=datetime.now)
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    built = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return built, size
+
+
+def main(players: int = 1000):
+    members = {idx: _Member(idx) for idx in range(1, players + 1)}
+    guild = type("Guild", (), {"get_member": staticmethod(members.get)})()
+
+    old, old_size = measure(
+        lambda: {
+            member_id: _PlayerData(member, last_answer=f"answer {member_id}")
+            for member_id, member in members.items()
+        }
+    )
+    table, table_size = measure(lambda: RGPlayerTable(guild, members))  # type: ignore
+
+    def reset_old():
+        for player in old.values():
+            player.answered = False
+
+    reset_calls = 1000
+    old_reset = timeit.timeit(reset_old, number=reset_calls) / reset_calls
+    new_reset = timeit.timeit(table.new_question, number=reset_calls) / reset_calls
+    print(f"{players} players")
+    for name, size, reset in (
+        ("dict[RGPlayerData]", old_size, old_reset),
+        ("RGPlayerTable", table_size, new_reset),
+    ):
+        print(f"{name:>20}: {size / 1024:10.1f}KiB  reset {reset * 1e6:9.2f}us")
+    print(f"saved {(old_size - table_size) / 1024:.1f}KiB ({1 - table_size / old_size:.0%})")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -13,7 +13,12 @@ from discord.ext.commands import errors
 from discord.ext.commands.context import Context
 
 from .config import CONFIG
-from .logs import BotLogger
+from .logs import LOGS, BotLogger
+from .utils.bulk_roles import ROLES
+from .utils.database import BatchWriter, close_connection
+from .utils.minigames import RENDERER
+from .utils.minigames.events import GAME_LOG
+from .utils.router import ROUTER
 
 if TYPE_CHECKING:
     from .models.modmail import ActiveMail, Ticket
@@ -37,6 +42,8 @@ class NhCord(commands.Bot):  # pylint: disable=R0901
         self.tickets: dict[int, Ticket] = {}
         self.mails: dict[int, ActiveMail] = {}
         self.log = BotLogger("[BOT]")
+        # games and mails register their channels on the router
+        self.add_listener(ROUTER.dispatch, "on_message")
         self.load_extension(".cogs", package="bot", recursive=False, store=False)
         self.load_extension(".events", package="bot", recursive=False, store=False)
 
@@ -83,7 +90,17 @@ class NhCord(commands.Bot):  # pylint: disable=R0901
             excfile.write(f"\n{err_id}\n")
             traceback.print_exc(file=excfile)
 
+    async def close(self):
+        RENDERER.shutdown()
+        GAME_LOG.close()
+        await BatchWriter.flush_all()
+        await close_connection()
+        await super().close()
+        # last, so everything logged while closing is written
+        LOGS.stop()
+
     async def on_ready(self):
         await self.change_presence(activity=discord.Game(name="NH: New Era"))
         self.log.info("Logged in as %s", self.user)
         self.log.info("Bot is ready!")
+        await ROLES.resume(self)
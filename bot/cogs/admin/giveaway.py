@@ -8,7 +8,8 @@ from discord import option
 from discord.ext import commands
 
 from ...logs.custom_logger import BotLogger
-from ...models.giveaway import GiveawayView
+from ...models.giveaway import (AUTHOR_INDEX, GIVEAWAYS, REROLL_WINDOW,
+                                GiveawayView)
 from .admin import AdminCog
 
 if TYPE_CHECKING:
@@ -21,6 +22,41 @@ class GiveawayCog(AdminCog):
     def __init__(self, bot: NhCord) -> None:
         super().__init__(bot)
         self.bot = bot
+        self.restored = False
+
+    @discord.Cog.listener()
+    async def on_ready(self):
+        # on_ready fires again after reconnects
+        if self.restored:
+            return
+        self.restored = True
+        channel = self.bot.get_channel(AUTHOR_INDEX.channel_id)
+        if isinstance(channel, discord.TextChannel):
+            self.bot.loop.create_task(AUTHOR_INDEX.backfill(channel))
+        else:
+            _log.warning("Giveaway data channel not found!")
+        records = await GIVEAWAYS.load(REROLL_WINDOW)
+        for record in records:
+            view = await GiveawayView.restore(self.bot, record)
+            if not view or not view.message:
+                continue
+            self.bot.add_view(view, message_id=view.message.id)
+            view.start_timer()
+        _log.info("Restored %i giveaways", len(records))
+
+    @discord.Cog.listener()
+    async def on_message(self, msg: discord.Message):
+        AUTHOR_INDEX.add(msg)
+
+    @discord.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        AUTHOR_INDEX.remove(payload.channel_id, (payload.message_id,))
+
+    @discord.Cog.listener()
+    async def on_raw_bulk_message_delete(
+        self, payload: discord.RawBulkMessageDeleteEvent
+    ):
+        AUTHOR_INDEX.remove(payload.channel_id, payload.message_ids)
 
     @commands.slash_command()
     @option(name="name", type=str, description="Set giveaway name")
@@ -75,13 +111,12 @@ class GiveawayCog(AdminCog):
             ],
             timestamp=datetime.now(),
         )
-        view = GiveawayView(
-            self.bot, winners, role, deltatime.total_seconds(), deadline
-        )
+        view = GiveawayView(self.bot, winners, role, deadline)
         await ctx.response.send_message(
             f"{role.mention if role else '@everyone'}" if tag else None,
             embed=embed,
             view=view,
         )
         _log.info("Giveaway created at %f", datetime.now().timestamp())
-        await view.start_timer()
+        await view.save()
+        view.start_timer()
@@ -1,14 +1,12 @@
 from __future__ import annotations
 
 import asyncio
-import csv
 import json
+import secrets
 from copy import copy
 from datetime import datetime, timedelta
-from io import StringIO
 from random import choice, shuffle
-from string import ascii_uppercase
-from typing import TYPE_CHECKING, Dict, List
+from typing import TYPE_CHECKING, Dict, List, Literal
 
 import discord
 from discord import Colour, option
@@ -16,15 +14,23 @@ from discord.ext import commands
 
 from ...data.minigames import BridgeGameSettings, RedGreenGameSettings
 from ...logs.custom_logger import BotLogger
-from ...models.minigames import (BridgeGameChoose, BridgeGameView, RGGameBase,
-                                 RGPlayerData, RGQuestion, RunningGame)
-from ...utils.minigames import TIMELEFT, get_member_by_role
+from ...models.minigames import (QUESTIONS, BridgeGameChoose, BridgeGameView,
+                                 ImportReport, RGGameBase, RGPlayerTable,
+                                 RunningGame)
+from ...utils.bulk_roles import ROLES
+from ...utils.minigames import (MAX_PANELS, RENDERER, TIMELEFT, groups_file,
+                                pairs_file, shuffled)
+from ...utils.minigames.events import GameEvent
+from ...utils.role_index import ROLE_INDEX
+from ...utils.router import ROUTER
 from .admin import AdminCog
 
 if TYPE_CHECKING:
     from ...bot import NhCord
 
-_log = BotLogger("[MINIGAMES]")
+# answers are logged for one in twenty, all of them stay in the ring buffer
+_log = BotLogger("[MINIGAMES]", sample=0.05)
+MAX_QUESTIONS_FILE = 5 * 1024 * 1024
 
 
 class MinigamesCog(AdminCog):
@@ -41,32 +47,28 @@ class MinigamesCog(AdminCog):
         self.running_game: Dict[int, RunningGame] = {}
         self.rg_game: Dict[int, RedGreenGameSettings] = {}
 
-    @discord.Cog.listener()
-    async def on_message(self, msg: discord.Message):
-        if msg.author.bot:
+    async def rg_message(self, msg: discord.Message):
+        settings = self.rg_game.get(msg.channel.id)
+        if not settings or msg.author.id in self.bot.owner_ids:
             return
-        channel = msg.channel.id
-        if self.rg_game and channel in self.rg_game:
-            settings = self.rg_game[channel]
-            if await self.bot.is_owner(msg.author):  # type: ignore
-                return
-            if msg.author.id not in settings.registered_player:
-                # await msg.delete()
-                return
-            if settings.base and settings.base.is_done:
-                return
-            player = settings.registered_player[msg.author.id]
-            if not settings.allowed:
-                # if await self.bot.is_owner(msg.author):  # type: ignore
-                #     return
-                # await msg.delete()
-                return await settings.eliminate_player(player.author)
-
-            # if player.is_afk():
-            #     return settings.eliminate_player(player.author, 1)
+        players = settings.registered_player
+        if msg.author.id not in players:
+            # await msg.delete()
+            return
+        if settings.base and settings.base.is_done:
+            return
+        if not settings.allowed:
+            # await msg.delete()
+            return await settings.eliminate_player(msg.author)
 
-            player.afk_counter = datetime.now()  # reset the afk from player
-            await player.validate_turn(msg, settings.current_question)
+        # afk players are eliminated by the game's bucket sweep
+        players.touch(msg.author.id)
+        correct = players.submit(msg.author.id, msg.content, settings.current_question)
+        if correct is not None and settings.base:
+            settings.base.record(GameEvent.ANSWER, msg.author.id, correct)
+        _log.kv(
+            "answer", channel=msg.channel.id, member=msg.author.id, correct=correct
+        )
 
     @mg_game.command(description="Squid game - glass game")
     @option(
@@ -102,7 +104,15 @@ class MinigamesCog(AdminCog):
         required=False,
         default=None,
     )
-    async def glass_game(
+    @option(
+        name="panels",
+        type=int,
+        description="Specify how many panels each segment has [4]",
+        min_value=2,
+        max_value=MAX_PANELS,
+        default=4,
+    )
+    async def glass_game(  # pylint: disable=too-many-locals
         self,
         ctx: discord.ApplicationContext,
         limit: int,
@@ -110,6 +120,7 @@ class MinigamesCog(AdminCog):
         role: discord.Role | None = None,
         loser_role: discord.Role | None = None,
         winner_role: discord.Role | None = None,
+        panels: int = 4,
     ):
         # await ctx.defer()
         if not isinstance(ctx.channel, discord.TextChannel):
@@ -146,6 +157,7 @@ class MinigamesCog(AdminCog):
             ),
             fields=[
                 discord.EmbedField("Players", str(len(players))),
+                discord.EmbedField("Panels", str(panels)),
                 discord.EmbedField("Time Limit", f"{limit} minute(s)"),
                 discord.EmbedField("Loser role", str(loser_role)),
                 discord.EmbedField("Winner role", str(winner_role)),
@@ -165,6 +177,7 @@ class MinigamesCog(AdminCog):
             loser_role=loser_role,
             winner_role=winner_role,
             running=True,
+            panels=panels,
         )
         settings.move_segments()
         view = BridgeGameView(
@@ -174,8 +187,8 @@ class MinigamesCog(AdminCog):
             ctx.channel,
             datetime.now() + timedelta(minutes=limit),
         )
-        file, embed = settings.generate_image()
-        await asyncio.sleep(5)
+        await asyncio.gather(RENDERER.warm(panels), asyncio.sleep(5))
+        file, embed = await settings.generate_image()
         view.msg = await ctx.send(
             "GAME START!\n"
             + TIMELEFT.format(time=round(view.deadline.timestamp()))
@@ -184,7 +197,7 @@ class MinigamesCog(AdminCog):
             file=file,
             embed=embed,
         )
-        self.bot.loop.create_task(view.start_timer())
+        view.start_timer()
 
     @mg_game.command(description="red green game based on questions")
     @option(
@@ -192,10 +205,17 @@ class MinigamesCog(AdminCog):
         type=discord.Role,
         description="Allowed Role to play the game",
     )
+    @option(
+        name="question_set",
+        type=str,
+        description="Name of the question set to play",
+    )
     @option(
         name="questions",
         type=discord.Attachment,
-        description="A csv file that containing questions",
+        description="A csv file (question,answer[,choices]) to import into the set",
+        required=False,
+        default=None,
     )
     @option(
         name="limit",
@@ -218,27 +238,45 @@ class MinigamesCog(AdminCog):
         default=5,
         description="Set the minimum total correct answer to win the game [5]",
     )
+    @option(
+        name="tolerance",
+        type=int,
+        min_value=0,
+        max_value=3,
+        default=0,
+        description="Typos allowed in written answers [0]",
+    )
     async def red_green(  # pylint: disable=too-many-locals
         self,
         ctx: discord.ApplicationContext,
         role: discord.Role,
-        questions: discord.Attachment,
+        question_set: str,
+        questions: discord.Attachment | None,
         limit: int,
         loser_role: discord.Role | None,
         min_correct: int,
+        tolerance: int = 0,
     ):
         await ctx.defer()
+        if ctx.guild is None or not isinstance(ctx.channel, discord.TextChannel):
+            return await ctx.respond("Must be in a server text channel")
         if role == loser_role:
             return await ctx.respond(
                 "Cannot assign same role for player and loser", ephemeral=True
             )
+        if questions:
+            report = await self.import_attachment(ctx.guild.id, question_set, questions)
+            await ctx.followup.send(report.summary())
+        deck = await QUESTIONS.deck(ctx.guild.id, question_set, tolerance)
+        if not deck:
+            return await ctx.respond(f"Question set {question_set} has no questions!")
 
-        players = {
-            member.id: RGPlayerData(member)
-            async for member in get_member_by_role(ctx.guild, role, None)
-        }
+        players = RGPlayerTable(
+            ctx.guild, ROLE_INDEX.query(ctx.guild, role.id, bots=False)
+        )
         if not players:
             return await ctx.respond("No players were found on that role!")
+        _log.info("Table of %i players uses %i bytes", len(players), players.nbytes)
         emb = discord.Embed(
             title="Game Details",
             description="There will be some questions appear on the chat"
@@ -251,30 +289,15 @@ class MinigamesCog(AdminCog):
                 discord.EmbedField("Time Limit", f"{limit}m"),
                 discord.EmbedField("Loser role", str(loser_role)),
                 discord.EmbedField("Minimum correct answer", str(min_correct)),
+                discord.EmbedField("Questions", f"{len(deck)} from {question_set}"),
             ],
             colour=discord.Colour.blurple(),
         )
-        content = await questions.read()
-        with StringIO(content.decode("utf-8")) as qcontent:
-            question = csv.DictReader(
-                qcontent, fieldnames=["question", "answer", "choices"], delimiter="-"
-            )
-            parsed_q: dict[str, RGQuestion] = {}
-            for quest in question:
-                parsed_q.update(
-                    {
-                        quest["question"].lower(): RGQuestion(
-                            quest["question"],
-                            quest["answer"],
-                            quest["choices"] or "No choices, guess it yourself (essay)",
-                        )
-                    }
-                )
         settings = RedGreenGameSettings(
             channel=ctx.channel,
             base=None,
             invoker=ctx.author,
-            questions=parsed_q,
+            questions=deck,
             channel_id=ctx.channel_id or 0,
             registered_player=players,
             running=True,
@@ -282,7 +305,8 @@ class MinigamesCog(AdminCog):
             min_correct=min_correct,
         )
         self.rg_game.update({ctx.channel_id or 0: settings})
-        game = RGGameBase(settings, limit, ctx.channel)
+        ROUTER.register(ctx.channel_id or 0, self.rg_message)
+        game = RGGameBase(settings, limit, ctx.channel, self.rg_message)
         settings.base = game
         deadline = datetime.now() + timedelta(minutes=limit)
         await ctx.send(content=f"{role.mention} prepare your game!")
@@ -290,7 +314,39 @@ class MinigamesCog(AdminCog):
             content=TIMELEFT.format(time=round(deadline.timestamp())),
             embed=emb,
         )
-        self.bot.loop.create_task(game.start_timer())
+        game.start_timer()
+
+    async def import_attachment(
+        self, guild_id: int, name: str, attachment: discord.Attachment
+    ):
+        if attachment.size > MAX_QUESTIONS_FILE:
+            return ImportReport(name, errors=[(0, "file is larger than 5 MiB")])
+        return await QUESTIONS.import_csv(guild_id, name, await attachment.read())
+
+    @mg_game.command(description="Import a csv of question,answer[,choices] lines")
+    @option(name="name", type=str, description="Question set to create or replace")
+    @option(name="questions", type=discord.Attachment, description="The csv file")
+    async def import_questions(
+        self,
+        ctx: discord.ApplicationContext,
+        name: str,
+        questions: discord.Attachment,
+    ):
+        await ctx.defer()
+        if ctx.guild is None:
+            return await ctx.respond("Must be in a server")
+        report = await self.import_attachment(ctx.guild.id, name, questions)
+        await ctx.respond(report.summary())
+
+    @mg_game.command(description="List the question sets of this server")
+    async def question_sets(self, ctx: discord.ApplicationContext):
+        if ctx.guild is None:
+            return await ctx.respond("Must be in a server")
+        sets = await QUESTIONS.sets(ctx.guild.id)
+        await ctx.respond(
+            "\n".join(f"**{name}**: {size} questions" for name, size in sets)
+            or "No question sets yet, add one with /mg import_questions"
+        )
 
     @mg_game.command()
     @option(name="role", type=discord.Role, description="role to assign")
@@ -303,56 +359,66 @@ class MinigamesCog(AdminCog):
         exception: discord.Role,
         which_role: discord.Role,
     ):
-        counter = 0
-        for member in ctx.guild.members:
-            if member.get_role(exception):
-                continue
-            if member.get_role(which_role):
-                await member.add_roles(role)
-                counter += 1
-        await ctx.respond(f"Succesfully asigned role {role} to {counter} members")
+        await ctx.defer()
+        if ctx.guild is None or not isinstance(ctx.channel, discord.abc.Messageable):
+            return await ctx.respond("Must be in a server channel")
+        found = ROLE_INDEX.query(ctx.guild, which_role.id, (exception.id,))
+        await ctx.respond(f"Assigning role {role} to {len(found)} members")
+        # interaction tokens expire after 15 minutes, long jobs edit a plain message
+        progress = await ctx.channel.send(f"Assigning role {role}...")
+        await ROLES.run(
+            role, found, reason=f"Assigned by {ctx.author}", progress=progress
+        )
 
-    @mg_game.command(description="divide all member on target role into 8 group")
+    @mg_game.command(description="divide all member on target role into groups")
     @option(name="role", type=discord.Role, description="role to divide")
+    @option(name="groups", type=int, min_value=2, default=8, description="[8]")
+    @option(name="seed", type=int, required=False, description="Repeat a shuffle")
+    @option(name="fmt", type=str, choices=["text", "csv"], default="text")
     async def divide_group(
         self,
         ctx: discord.ApplicationContext,
         role: discord.Role,
+        groups: int = 8,
+        seed: int | None = None,
+        fmt: Literal["text", "csv"] = "text",
     ):
-        counter = 1
-        groups: dict[int, list[discord.Member]] = {k + 1: [] for k in range(8)}
-        for member in ctx.guild.members:
-            if member.get_role(role.id):
-                groups[counter].append(member)
-                counter += 1
-                if counter > 8:
-                    counter = 1
-                continue
-        msgs = [
-            f"{idx}: " + ", ".join(mem.mention for mem in items)
-            for idx, items in groups.items()
-        ]
-        await ctx.respond("\n".join(msgs))
+        await ctx.defer()
+        if ctx.guild is None:
+            return await ctx.respond("Must be in a server")
+        seed = secrets.randbits(32) if seed is None else seed
+        order = shuffled(ROLE_INDEX.query(ctx.guild, role.id, bots=False), seed)
+        if not order:
+            return await ctx.respond("No members were found on that role!")
+        await ctx.respond(
+            f"Divided {len(order)} members of {role} into "
+            + f"{min(groups, len(order))} groups (seed {seed})",
+            file=groups_file(ctx.guild, order, groups, fmt),
+        )
 
-    # @mg_game.command(description="pair all member on target role")
-    # @option(name="role", type=discord.Role, description="role to divide")
-    # async def pair_two(
-    #     self,
-    #     ctx: discord.ApplicationContext,
-    #     role: discord.Role,
-    # ):
-    #     found = [member for member in ctx.guild.members if member.get_role(role.id)]
-    #     divide = round(len(found) / 2)
-    #     shuffle(found)
-    #     first, second = found[:divide], found[divide:]
-    #     popped = second.pop() if len(second) % 2 else None
-    #     with open("paired.txt", "w", encoding="utf-8") as text:
-    #         for idx, (one, two) in enumerate(zip(first, second)):
-    #             text.writelines(f"{idx}. {one.mention} vs {two.mention}\n")
-    #         file = discord.File(text, filename="paired.txt")
-    #         await ctx.respond(file=file)
-    #     if popped:
-    #         await ctx.send(f"{popped.mention} left unpaired")
+    @mg_game.command(description="pair all member on target role")
+    @option(name="role", type=discord.Role, description="role to pair")
+    @option(name="seed", type=int, required=False, description="Repeat a shuffle")
+    @option(name="fmt", type=str, choices=["text", "csv"], default="text")
+    async def pair_two(
+        self,
+        ctx: discord.ApplicationContext,
+        role: discord.Role,
+        seed: int | None = None,
+        fmt: Literal["text", "csv"] = "text",
+    ):
+        await ctx.defer()
+        if ctx.guild is None:
+            return await ctx.respond("Must be in a server")
+        seed = secrets.randbits(32) if seed is None else seed
+        order = shuffled(ROLE_INDEX.query(ctx.guild, role.id, bots=False), seed)
+        if len(order) < 2:
+            return await ctx.respond("Not enough members to pair on that role!")
+        await ctx.respond(
+            f"Paired {len(order) // 2 * 2} members of {role} (seed {seed})"
+            + (f", {len(order) % 2} left unpaired" if len(order) % 2 else ""),
+            file=pairs_file(ctx.guild, order, fmt),
+        )
 
     @commands.command(name="rgsignal")
     async def set_rg_signal(self, ctx: commands.Context):
@@ -366,6 +432,7 @@ class MinigamesCog(AdminCog):
         # settings.reset_turn()
         signal = choice([True, False])
         settings.allowed = signal
+        settings.base.record(GameEvent.SIGNAL, ctx.author.id, signal)
         await ctx.reply(":green_circle:" if signal else ":red_circle:")
 
     @commands.command(name="rgkill")
@@ -376,6 +443,7 @@ class MinigamesCog(AdminCog):
         if settings.base and not settings.base.is_done:
             await settings.base.done()
         del self.rg_game[ctx.channel.id]
+        ROUTER.unregister(ctx.channel.id, self.rg_message)
         await ctx.reply("Succesfully removed current running game")
 
     @commands.command(name="rgquest")
@@ -391,35 +459,25 @@ class MinigamesCog(AdminCog):
             return await ctx.reply("No more questions to pick!")
         if settings.current_question:
             question = settings.current_question
-            try:
-                idx = ascii_uppercase.index(question.answer)
-            except ValueError:
-                idx = None
-            answer = question.choices.split("||")[idx] if idx is not None else ""
             await ctx.reply(
                 embed=discord.Embed(
-                    description=f"Previous answer was: **{question.answer}. {answer}**",
+                    description=f"Previous answer was: **{question.revealed}**",
                     colour=discord.Color.dark_orange(),
                 )
             )
             await asyncio.sleep(5)
-        keys = list(settings.questions)
-        to_update = settings.questions.pop(choice(keys))
+        to_update = await settings.questions.draw()
         if not to_update:
             return await ctx.reply("question not found!")
         settings.reset_turn()
         settings.current_question = to_update
-        choices = (
-            "\n".join(
-                f"{ascii_uppercase[idx]}. {choice}"
-                for idx, choice in enumerate(to_update.choices.split("||"))
+        if settings.base:
+            settings.base.record(
+                GameEvent.QUESTION, ctx.author.id, len(settings.questions)
             )
-            if to_update.choices.find("||") > 0
-            else to_update.choices
-        )
         await ctx.reply(
             embed=discord.Embed(
-                description=f"**{to_update.quest}**\n{choices}",
+                description=to_update.rendered,
                 colour=discord.Colour.blurple(),
             )
         )
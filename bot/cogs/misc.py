@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import io
 from time import perf_counter
 from typing import TYPE_CHECKING
 
@@ -7,6 +8,10 @@ import discord
 from discord import Cog, option, slash_command
 from discord.commands import ApplicationContext
 
+from ..logs import LOGS, RECENT
+from ..utils.edits import EDITS
+from ..utils.scheduler import SCHEDULER
+
 if TYPE_CHECKING:
     from bot.bot import NhCord
 
@@ -92,6 +97,59 @@ class MiscCog(Cog):
             f"Cached {count} server members, {bot} server bots, in {(perf_counter() - start):.2f}s"
         )
 
+    @slash_command(description="Show pending timers and how late they fire")
+    async def scheduler_stats(self, ctx: discord.ApplicationContext):
+        stats = SCHEDULER.stats()
+        await ctx.respond(
+            f"Pending timers: {stats['pending']} ({stats['heap']} heap entries)\n"
+            + f"Fired: {stats['fired']}\n"
+            + f"Lateness: avg {stats['avg_lateness'] * 1000:.1f}ms, "
+            + f"max {stats['max_lateness'] * 1000:.1f}ms",
+            ephemeral=True,
+        )
+
+    @slash_command(description="Show how many message edits were coalesced")
+    async def edit_stats(self, ctx: discord.ApplicationContext):
+        stats = EDITS.stats()
+        await ctx.respond(
+            f"Tracked messages: {stats['tracked']}\n"
+            + f"Dirty marks: {stats['marks']}\n"
+            + f"Edits sent: {stats['sent']}, saved: {stats['saved']}",
+            ephemeral=True,
+        )
+
+    @slash_command(description="Dump the recent structured log records")
+    @option(
+        "logger",
+        str,
+        description="Only records of this logger, e.g. [MG BRIDGE]",
+        required=False,
+        default=None,
+    )
+    @option(
+        "limit",
+        int,
+        description="Newest records to include",
+        min_value=1,
+        required=False,
+        default=None,
+    )
+    async def recent_logs(
+        self,
+        ctx: discord.ApplicationContext,
+        logger: str | None = None,
+        limit: int | None = None,
+    ):
+        dump = "\n".join(RECENT.dump(logger, limit))
+        stats = LOGS.stats()
+        await ctx.respond(
+            f"{len(RECENT)} records buffered from {len(RECENT.rings)} loggers, "
+            + f"log queue {stats['queued']}, "
+            + f"dropped {stats['dropped'] or 0}",
+            file=discord.File(io.BytesIO(dump.encode()), filename="recent.log"),
+            ephemeral=True,
+        )
+
     @slash_command()
     @option(name="member", type=discord.Member)
     async def get_user_perms(
@@ -1,13 +1,21 @@
 import json
-from typing import TypedDict
+from typing import Literal, NotRequired, TypedDict
 
 __all__ = ("CONFIG",)
 
 
+class TBoardConfig(TypedDict, total=False):
+    fmt: Literal["png", "jpeg", "webp"]
+    quality: int
+    workers: int
+    processes: bool
+
+
 class TConfig(TypedDict):
     prefix: str
     owner_ids: list[int]
     guild: int
+    board: NotRequired[TBoardConfig]
 
 
 with open("config.json", "rb") as config_f:
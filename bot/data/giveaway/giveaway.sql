@@ -0,0 +1,47 @@
+CREATE TABLE IF NOT EXISTS giveaways (
+    giveaway_id TEXT PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    role_id INTEGER,
+    max_winner INTEGER NOT NULL,
+    deadline REAL NOT NULL,
+    ended INTEGER NOT NULL DEFAULT 0
+);
+
+-- rowid keeps the participation order
+CREATE TABLE IF NOT EXISTS giveaway_participants (
+    giveaway_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    UNIQUE (giveaway_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS giveaway_winners (
+    giveaway_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    UNIQUE (giveaway_id, user_id)
+);
+
+-- seed of the winner permutation and how much of it was drawn
+CREATE TABLE IF NOT EXISTS giveaway_draws (
+    giveaway_id TEXT PRIMARY KEY,
+    seed INTEGER NOT NULL,
+    drawn INTEGER NOT NULL
+);
+
+-- author index of the giveaway data channel
+CREATE TABLE IF NOT EXISTS author_messages (
+    channel_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    PRIMARY KEY (channel_id, message_id)
+);
+
+CREATE INDEX IF NOT EXISTS author_messages_author
+    ON author_messages (channel_id, author_id, message_id);
+
+-- every message up to last_message_id is indexed
+CREATE TABLE IF NOT EXISTS author_index_state (
+    channel_id INTEGER PRIMARY KEY,
+    last_message_id INTEGER NOT NULL
+);
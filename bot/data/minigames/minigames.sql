@@ -0,0 +1,18 @@
+-- red/green question bank, sets are named per guild
+CREATE TABLE IF NOT EXISTS question_sets (
+    guild_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (guild_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS questions (
+    question_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    set_name TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    choices TEXT NOT NULL DEFAULT ''
+);
+
+CREATE INDEX IF NOT EXISTS questions_set ON questions (guild_id, set_name);
@@ -2,15 +2,18 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from random import randint
-from typing import TYPE_CHECKING, Dict, List, Literal, Set
+from typing import TYPE_CHECKING, List, Literal, Sequence, Set
 
-from discord import Colour, Embed, File, Member, Role, TextChannel, User
+from discord import Colour, Embed, Member, Role, TextChannel, User
 
 from ...logs.custom_logger import BotLogger
-from ...utils.minigames import create_image_grid
+from ...utils.bulk_roles import ROLES
+from ...utils.minigames import RENDERER
+from ...utils.minigames.events import GameEvent
 
 if TYPE_CHECKING:
-    from ...models.minigames import RGGameBase, RGPlayerData, RGQuestion
+    from ...models.minigames import (QuestionDeck, RGGameBase, RGPlayerTable,
+                                     RGQuestion)
 
 GLASS_GAME_FORMATTER = "Segments: {}\n{}'s turn!\nWhich bridge is SAFE?!!!"
 THUMBNAIL_URL = (
@@ -21,9 +24,38 @@ If you fail the bridge, you will be eliminated directly\n\
 If the time limit runs out, before segments reached\n\
 everyone in this stage gonna fail\n\
 you can switch between players by clicking switch button"
+ELIMINATION_REASONS = {0: "", 1: "For AFK!", 2: "For not enough correct answers"}
+# characters of mentions per summary embed, descriptions hold up to 4096
+ELIMINATION_PAGE = 4000
 _log = BotLogger("[SETTINGS]")
 
 
+def elimination_embeds(players: Sequence[Member | User], reason: str):
+    if len(players) == 1:
+        yield Embed(
+            description=f"{players[0].mention} *Eliminated {reason}*",
+            color=Colour.red(),
+        )
+        return
+    pages: List[List[str]] = []
+    size = ELIMINATION_PAGE
+    for player in players:
+        mention = player.mention
+        if size + len(mention) + 2 > ELIMINATION_PAGE:
+            pages.append([])
+            size = 0
+        pages[-1].append(mention)
+        size += len(mention) + 2
+    for number, page in enumerate(pages, 1):
+        emb = Embed(
+            title=f"{len(players)} players eliminated",
+            description=", ".join(page),
+            color=Colour.red(),
+        )
+        emb.set_footer(text=f"{reason} Page {number}/{len(pages)}".strip())
+        yield emb
+
+
 @dataclass
 class BaseSettings:
     channel_id: int
@@ -34,8 +66,8 @@ class BaseSettings:
 class RedGreenGameSettings(BaseSettings):
     base: RGGameBase | None
     invoker: Member
-    questions: Dict[str, RGQuestion]
-    registered_player: Dict[int, RGPlayerData]
+    questions: QuestionDeck
+    registered_player: RGPlayerTable
     channel: TextChannel
     current_question: RGQuestion | None = None
     allowed: bool = False
@@ -44,29 +76,38 @@ class RedGreenGameSettings(BaseSettings):
     min_correct: int = 5
 
     def reset_turn(self):
-        for player in self.registered_player.values():
-            player.answered = False
+        self.registered_player.new_question()
 
     async def eliminate_player(
         self,
         player: Member | User,
         msg: Literal[0, 1, 2] = 0,
     ):
-        elim_map = {0: "", 1: "For AFK!", 2: "For not enough correct answers"}
-        emb = Embed(
-            description=f"{player.mention} *Eliminated {elim_map.get(msg, '')}*",
-            color=Colour.red(),
-        )
-        if self.loser_role:
-            await player.add_roles(self.loser_role)  # type: ignore
-        try:
-            elim = self.registered_player.pop(player.id)
-            # elim = self.registered_player[player.id]
-        except (KeyError, IndexError):
-            self.fail_player.add(player)  # type: ignore
-            return
-        self.fail_player.add(elim.author)
-        await self.channel.send(embed=emb)
+        return await self.eliminate_players((player,), msg)
+
+    async def eliminate_players(
+        self,
+        players: Sequence[Member | User],
+        msg: Literal[0, 1, 2] = 0,
+    ):
+        """Eliminate everyone at once, one role job and a few summary messages"""
+        removed = [
+            player for player in players if self.registered_player.remove(player.id)
+        ]
+        if self.base:
+            for player in removed:
+                self.base.record(GameEvent.ELIMINATE, player.id, msg)
+        self.fail_player.update(removed)  # type: ignore
+        if self.loser_role and removed:
+            ROLES.submit(
+                self.loser_role,
+                removed,
+                reason="Eliminated from the game",
+                journal=len(removed) > 1,
+            )
+        for emb in elimination_embeds(removed, ELIMINATION_REASONS.get(msg, "")):
+            await self.channel.send(embed=emb)
+        return removed
 
 
 @dataclass(slots=True)
@@ -82,9 +123,10 @@ class BridgeGameSettings(BaseSettings):
     winner_role: Role | None = None
     segment: int = 1
     revealed_bridge: Set[int] = field(default_factory=set)
+    panels: int = 4
 
     def move_segments(self):
-        self.safe_point = randint(0, 3)
+        self.safe_point = randint(0, self.panels - 1)
         _log.info("Safe point is %i", self.safe_point)
         self.revealed_bridge = set()
 
@@ -93,8 +135,8 @@ class BridgeGameSettings(BaseSettings):
             self.revealed_bridge.add(safe_pos)
             _log.info("Player %s eliminated from glass game", self.turn.name)
             self.fail_player.append(self.turn)
-        if self.loser_role:
-            await self.turn.add_roles(self.loser_role)  # type: ignore
+            if self.loser_role:
+                ROLES.submit(self.loser_role, (self.turn,), reason="Losing the game")
         if not self.players:
             raise ValueError("no more players!")
         if safe_pos is None:  # assume player clicked switch player
@@ -102,30 +144,25 @@ class BridgeGameSettings(BaseSettings):
         self.turn = self.players.pop(0)
         return self.turn
 
-    def generate_image(self, reveal: bool = False):
+    async def generate_image(self, reveal: bool = False):
         if reveal:
-            self.revealed_bridge = set(range(4))
-        img = create_image_grid(list(self.revealed_bridge), self.safe_point)
-        img.save("bridgechoose.png")
-        img = File("bridgechoose.png", "bridgechoose.png")
+            self.revealed_bridge = set(range(self.panels))
+        img = await RENDERER.file(self.revealed_bridge, self.safe_point, self.panels)
         embed = Embed(
             title="Choose the bridge!",
             description=f"**Panel: {self.segment}**\n" + BRIDGE_RULES,
             colour=Colour.teal(),
         )
         embed.set_thumbnail(url=THUMBNAIL_URL)
-        embed.set_image(url="attachment://bridgechoose.png")
+        embed.set_image(url=f"attachment://{RENDERER.filename}")
         return img, embed
 
     async def assign_role(self, target: Literal["winner", "loser", "failed"]):
         if self.loser_role and target == "loser":
-            for fail in self.fail_player:
-                await fail.add_roles(self.loser_role, reason="Losing the game")  # type: ignore
+            await ROLES.run(self.loser_role, self.fail_player, reason="Losing the game")
         elif self.winner_role and target == "winner":
-            for winner in self.players:
-                await winner.add_roles(
-                    self.winner_role, reason="Winning the game"  # type: ignore
-                )
+            await ROLES.run(self.winner_role, self.players, reason="Winning the game")
         elif target == "failed" and self.loser_role:
-            for player in self.registered_player:
-                await player.add_roles(self.loser_role)  # type: ignore
+            await ROLES.run(
+                self.loser_role, self.registered_player, reason="Losing the game"
+            )
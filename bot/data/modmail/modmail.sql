@@ -0,0 +1,32 @@
+-- every mail message, rowid keeps the order of a conversation
+CREATE TABLE IF NOT EXISTS mail_messages (
+    entry_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    sent REAL NOT NULL,
+    content TEXT NOT NULL,
+    attachments TEXT NOT NULL DEFAULT ''
+);
+
+CREATE INDEX IF NOT EXISTS mail_messages_user ON mail_messages (user_id, entry_id);
+
+-- full text index over mail_messages, kept in step by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS mail_search USING fts5 (
+    content,
+    attachments,
+    content = 'mail_messages',
+    content_rowid = 'entry_id'
+);
+
+CREATE TRIGGER IF NOT EXISTS mail_messages_insert AFTER INSERT ON mail_messages
+BEGIN
+    INSERT INTO mail_search (rowid, content, attachments)
+        VALUES (new.entry_id, new.content, new.attachments);
+END;
+
+CREATE TRIGGER IF NOT EXISTS mail_messages_delete AFTER DELETE ON mail_messages
+BEGIN
+    INSERT INTO mail_search (mail_search, rowid, content, attachments)
+        VALUES ('delete', old.entry_id, old.content, old.attachments);
+END;
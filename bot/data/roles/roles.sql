@@ -0,0 +1,15 @@
+-- bulk role jobs that have not finished yet
+CREATE TABLE IF NOT EXISTS role_jobs (
+    job_id TEXT PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    remove INTEGER NOT NULL,
+    reason TEXT
+);
+
+CREATE TABLE IF NOT EXISTS role_job_members (
+    job_id TEXT NOT NULL,
+    member_id INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, member_id)
+);
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+from .members import MemberIndexer
 from .modmail import ModMail
 
 if TYPE_CHECKING:
     from ..bot import NhCord
 
-EVENTS = [ModMail]
+EVENTS = [MemberIndexer, ModMail]
 
 
 def setup(bot: NhCord):
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import discord
+from discord import Cog
+
+from ..utils.role_index import ROLE_INDEX
+
+if TYPE_CHECKING:
+    from ..bot import NhCord
+
+
+class MemberIndexer(Cog):
+    """Keeps the role index in step with the member cache"""
+
+    def __init__(self, bot: NhCord) -> None:
+        self.bot = bot
+
+    @Cog.listener()
+    async def on_ready(self):
+        # members are chunked before on_ready, rebuilding also covers reconnects
+        for guild in self.bot.guilds:
+            ROLE_INDEX.build(guild)
+
+    @Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        index = ROLE_INDEX.guilds.get(member.guild.id)
+        if index:
+            index.add(member)
+
+    @Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        index = ROLE_INDEX.guilds.get(member.guild.id)
+        if index:
+            index.remove(member)
+
+    @Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        index = ROLE_INDEX.guilds.get(after.guild.id)
+        if index and before.roles != after.roles:
+            index.update(before, after)
+
+    @Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        index = ROLE_INDEX.guilds.get(role.guild.id)
+        if index:
+            index.drop_role(role.id)
@@ -14,8 +14,11 @@ from bot.logs.custom_logger import BotLogger
 from ..config import CONFIG
 from ..models.modmail.mail import ActiveMail
 from ..models.modmail.ticket import Ticket
+from ..models.modmail.transcripts import TRANSCRIPTS
 from ..utils.check import admin_check, is_admin
 from ..utils.modmail_utils import ALLOW_READ, create_perms_channel
+from ..utils.role_index import ROLE_INDEX
+from ..utils.router import ROUTER
 
 if TYPE_CHECKING:
     from ..bot import NhCord
@@ -130,7 +133,7 @@ class MailSelectView(discord.ui.View):
         await interaction.followup.send(f"Deleted {counter} mail channels")
 
 
-class ModMail(Cog):
+class ModMail(Cog):  # pylint: disable=too-many-public-methods
     SlashMail = discord.SlashCommandGroup(
         name="modmail", checks=[admin_check], guild_only=True
     )
@@ -138,15 +141,46 @@ class ModMail(Cog):
     def __init__(self, bot: NhCord) -> None:
         self.bot = bot
         self.enabled = True
+        ROUTER.dm_handler = self.dm_message
 
     @property
     def tickets(self):
         return self.bot.tickets
 
+    def cog_unload(self):
+        ROUTER.dm_handler = None
+        for mail in self.bot.mails.values():
+            ROUTER.unregister(mail.channel.id, self.mail_message)
+
+    @Cog.listener()
+    async def on_ready(self):
+        guild = self.bot.get_guild(CONFIG["guild"])
+        if not guild:
+            return
+        # mail channels of a previous run, named by the sender id
+        for channel in guild.text_channels:
+            if not channel.name.isnumeric():
+                continue
+            member = guild.get_member(int(channel.name))
+            if member and member.id not in self.bot.mails:
+                self.route(ActiveMail.update_mail(self.bot, member, channel))
+
     @Cog.listener()
-    async def on_message(self, msg: discord.Message):
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        ROUTER.unregister(channel.id, self.mail_message)
+
+    def route(self, mail: ActiveMail):
+        ROUTER.register(mail.channel.id, self.mail_message)
+        return mail
+
+    async def mail_message(self, msg: discord.Message):
+        if not self.enabled or not isinstance(msg.channel, discord.TextChannel):
+            return
+        await self.listen_mail(msg.channel, msg.content, msg.author)
+
+    async def dm_message(self, msg: discord.Message):
         author = msg.author
-        if author.bot or not self.enabled:
+        if not self.enabled:
             return
 
         guild = self.bot.get_guild(CONFIG["guild"])
@@ -155,18 +189,11 @@ class ModMail(Cog):
             raise ValueError("Guild not found")
         if not guild.get_member(author.id):
             return
-        if msg.guild:
-            if isinstance(msg.channel, discord.TextChannel):
-                try:
-                    int(msg.channel.name)
-                except ValueError:
-                    return
-                return await self.listen_mail(msg.channel, msg.content, msg.author)
-            return
         mail = self.check_mail(guild, author)
         if not mail:
             mail = await ActiveMail.create_mail(guild, self.bot, author)
             self.bot.mails.update({author.id: mail})
+            self.route(mail)
 
         urls = [
             file.url for file in msg.attachments if not file.filename.endswith(".exe")
@@ -202,8 +229,7 @@ class ModMail(Cog):
 
         for text in guild.text_channels:
             if text.name == str(user.id):
-                mail = ActiveMail.update_mail(self.bot, user, text)
-                return mail
+                return self.route(ActiveMail.update_mail(self.bot, user, text))
         return None
 
     async def delete_ticket(self, ctx: commands.Context):
@@ -268,15 +294,13 @@ class ModMail(Cog):
     @modmail.command("purge")  # type: ignore
     @commands.check(admin_check)
     async def purge_mm(self, ctx: commands.Context):
-        mails: list[discord.TextChannel] = []
-        for channel in ctx.guild.text_channels:
-            try:
-                ids = int(channel.name)
-            except ValueError:
-                continue
-            member = ctx.guild.get_member(ids)
-            if member:
-                mails.append(channel)
+        assert ctx.guild, "the modmail group is guild only"
+        members = ROLE_INDEX.of(ctx.guild).members
+        mails = [
+            channel
+            for channel in ctx.guild.text_channels
+            if channel.name.isnumeric() and int(channel.name) in members
+        ]
         if not mails:
             return await ctx.reply("No mail channel found!")
         await ctx.reply(f"This will purge {len(mails)} mail channel, reply with yes")
@@ -338,6 +362,52 @@ class ModMail(Cog):
         await mail.channel.delete(reason="Deleted mail channel")
         del mail
 
+    @SlashMail.command(name="search", description="Search every mail transcript")
+    @option(
+        name="query",
+        type=str,
+        description='Words to find, supports "phrases", OR, NOT and prefix*',
+    )
+    @option(
+        name="user",
+        type=discord.User,
+        description="Only the transcript of this user",
+        required=False,
+        default=None,
+    )
+    @option(
+        name="limit",
+        type=int,
+        description="Matches to show",
+        min_value=1,
+        max_value=25,
+        default=10,
+    )
+    async def smm_search(
+        self,
+        ctx: discord.ApplicationContext,
+        query: str,
+        user: discord.User | None = None,
+        limit: int = 10,
+    ):
+        await ctx.defer(ephemeral=True)
+        try:
+            hits = await TRANSCRIPTS.search(query, user.id if user else None, limit)
+        except ValueError as exc:
+            return await ctx.respond(str(exc), ephemeral=True)
+        if not hits:
+            return await ctx.respond("No messages found", ephemeral=True)
+        emb = discord.Embed(
+            title=f"Mail search: {query}"[:256], colour=discord.Colour.blurple()
+        )
+        for hit in hits:
+            emb.add_field(
+                name=f"{hit.author} in <@{hit.user_id}>'s mail"[:256],
+                value=f"<t:{round(hit.sent)}:f> {hit.snippet}"[:1024],
+                inline=False,
+            )
+        await ctx.respond(embed=emb, ephemeral=True)
+
     async def check_response(self, ctx: commands.Context):
         def check(message: discord.Message):
             return (
@@ -1 +1 @@
-from .custom_logger import BotLogger
+from .custom_logger import LOGS, RECENT, BotLogger
@@ -1,7 +1,21 @@
+import atexit
+import heapq
 import logging
-import os
+import queue
+import random
 import time
+from collections import Counter, deque
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, NamedTuple, Tuple
+
+LOG_FILE = "./bot/logs/logs.log"
+EXC_FILE = "./bot/logs/exceptions.log"
+# records waiting for the writer thread, anything past this is dropped
+QUEUE_SIZE = 10_000
+# structured records kept in memory per logger for the recent log dump
+RING_SIZE = 1024
 
 
 class CustomFormatter(logging.Formatter):
@@ -23,46 +37,223 @@ class CustomFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + formatstr + reset,
     }
 
+    def __init__(self) -> None:
+        super().__init__(self.formatstr, datefmt=self.datefmt)
+        # compiled once, format only picks the one for the level
+        self.formatters = {
+            level: logging.Formatter(fmt, datefmt=self.datefmt)
+            for level, fmt in self.FORMATS.items()
+        }
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt=self.datefmt)
-        return formatter.format(record)
+        formatter = self.formatters.get(record.levelno)
+        return formatter.format(record) if formatter else super().format(record)
+
+
+class Route(NamedTuple):
+    """Where the writer sends the records of a logger"""
+
+    path: str
+    file: logging.Formatter
+    console: logging.Formatter
+
+
+class PipelineHandler(QueueHandler):
+    """Hands records to the writer thread without ever blocking the caller"""
+
+    def __init__(self, pipeline: "LogPipeline", route: Route) -> None:
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+        self.route = route
+
+    def prepare(self, record: logging.LogRecord):
+        # the message is merged now, arguments may change after the call
+        # returns; the writer lives in this process, exc_info can travel.
+        # this is the only handler of its loggers, no copy is needed
+        record.msg = record.getMessage()
+        record.args = None
+        record.route = self.route
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        self.pipeline.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.pipeline.dropped[record.levelname] += 1
+
+
+class _Writer(logging.Handler):
+    """Runs on the listener thread, the only owner of the log files"""
+
+    def __init__(self, pipeline: "LogPipeline") -> None:
+        super().__init__(logging.DEBUG)
+        self.pipeline = pipeline
+        self.files: Dict[str, logging.FileHandler] = {}
+        self.consoles: Dict[int, logging.StreamHandler] = {}
+        self.reported = 0
+
+    def handle(self, record: logging.LogRecord):
+        route: Route = record.route  # type: ignore
+        self._report_drops(route)
+        self._file(route).handle(record)
+        self._console(route.console).handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        self.handle(record)
+
+    def _file(self, route: Route):
+        handler = self.files.get(route.path)
+        if handler is None:
+            Path(route.path).parent.mkdir(parents=True, exist_ok=True)
+            handler = self.files[route.path] = logging.FileHandler(
+                route.path, encoding="utf-8"
+            )
+            handler.setFormatter(route.file)
+        return handler
+
+    def _console(self, formatter: logging.Formatter):
+        handler = self.consoles.get(id(formatter))
+        if handler is None:
+            handler = self.consoles[id(formatter)] = logging.StreamHandler()
+            handler.setFormatter(formatter)
+        return handler
+
+    def _report_drops(self, route: Route):
+        dropped = sum(self.pipeline.dropped.values())
+        if dropped == self.reported:
+            return
+        self.reported = dropped
+        record = logging.makeLogRecord(
+            {
+                "name": "[LOGS]",
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Queue was full, dropped {dict(self.pipeline.dropped)} records",
+            }
+        )
+        self._file(route).handle(record)
+        self._console(route.console).handle(record)
+
+    def close(self):
+        for handler in (*self.files.values(), *self.consoles.values()):
+            handler.close()
+        self.files.clear()
+        self.consoles.clear()
+        super().close()
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # the queue may be full when stopping, wait for the writer to make room
+        self.queue.put(self._sentinel)  # type: ignore
+
+
+class LogPipeline:
+    """One bounded queue and one writer thread behind every bot logger
+
+    Logging calls only put a record on the queue, formatting and file
+    writes happen on the listener thread. When the writer falls behind
+    records are dropped and counted per level instead of stalling the
+    event loop, the counts are written to the log once it catches up.
+    """
+
+    def __init__(self, size: int = QUEUE_SIZE) -> None:
+        self.queue: queue.Queue[logging.LogRecord] = queue.Queue(size)
+        self.dropped: Counter[str] = Counter()
+        self.handlers: Dict[Route, PipelineHandler] = {}
+        self.listener: QueueListener | None = None
+        self.writer: _Writer | None = None
+
+    def handler(self, path: str, file: logging.Formatter, console: logging.Formatter):
+        route = Route(path, file, console)
+        handler = self.handlers.get(route)
+        if handler is None:
+            handler = self.handlers[route] = PipelineHandler(self, route)
+        return handler
+
+    def start(self):
+        if self.listener is None:
+            self.writer = _Writer(self)
+            self.listener = _Listener(self.queue, self.writer)
+            self.listener.start()
+
+    def stop(self):
+        """Write out everything queued and close the files"""
+        if self.listener is None:
+            return
+        self.listener.stop()
+        self.listener = None
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "dropped": dict(self.dropped)}
+
+
+class RingBuffer:
+    """The latest structured records at full detail, whether sampled or not
+
+    Every logger has its own ring, a burst on one hot path does not push
+    out the context of the others.
+    """
+
+    def __init__(self, size: int = RING_SIZE) -> None:
+        self.size = size
+        self.rings: Dict[str, Deque[Tuple[float, str, str, Dict[str, Any]]]] = {}
+
+    def __len__(self):
+        return sum(len(ring) for ring in self.rings.values())
+
+    def append(self, name: str, event: str, fields: Dict[str, Any]):
+        ring = self.rings.get(name)
+        if ring is None:
+            ring = self.rings[name] = deque(maxlen=self.size)
+        ring.append((time.time(), name, event, fields))
+
+    def dump(self, name: str | None = None, limit: int | None = None) -> Iterator[str]:
+        """Oldest first, optionally only the records of one logger"""
+        rings = [self.rings.get(name, ())] if name else list(self.rings.values())
+        # every ring is in time order already
+        records = list(heapq.merge(*rings, key=lambda record: record[0]))
+        for stamp, logger, event, fields in records[-limit if limit else 0 :]:
+            when = datetime.fromtimestamp(stamp).isoformat(" ", "milliseconds")
+            yield f"{when} {logger} {event} {_pairs(fields)}"
+
+
+def _pairs(fields: Dict[str, Any]):
+    return " ".join(f"{key}={value}" for key, value in fields.items())
+
+
+LOGS = LogPipeline()
+RECENT = RingBuffer()
+atexit.register(LOGS.stop)
+_BOT_FILE_FORMAT = logging.Formatter(CustomFormatter.formatstr)
+_BOT_CONSOLE_FORMAT = CustomFormatter()
 
 
 class BotLogger(logging.Logger):
-    def __init__(self, name: str, err: bool = False) -> None:
+    def __init__(self, name: str, err: bool = False, sample: float = 1.0) -> None:
         super().__init__(name, logging.DEBUG)
-        console_hndl = logging.StreamHandler()
-        console_hndl.setLevel(logging.DEBUG)
-        console_hndl.setFormatter(CustomFormatter())
-
-        # watch for the path
-        file_handle = logging.FileHandler(
-            "./bot/logs/logs.log" if not err else "./bot/logs/exceptions.log",
-            encoding="utf-8",
-        )
-        file_handle.setLevel(logging.DEBUG)
-        file_handle.setFormatter(logging.Formatter(CustomFormatter.formatstr))
-        self.addHandler(file_handle)
-        self.addHandler(console_hndl)
-
-
-class MailLogger(logging.Logger):
-    def __init__(self, name: str) -> None:
-        super().__init__(name, logging.INFO)
-        console_hndl = logging.StreamHandler()
-        console_hndl.setLevel(logging.INFO)
-        console_hndl.setFormatter(
-            logging.Formatter("%(name)s - %(message)s - at %(asctime)s")
-        )
-        log_path = Path(f"bot/logs/{name}/{name}-logs.log")
-        if not log_path.exists():
-            os.mkdir(os.getcwd() + f"/bot/logs/{name}")
-        # watch for the path
-        file_handle = logging.FileHandler(
-            f"bot/logs/{name}/{name}-logs.log",
-            encoding="utf-8",
+        self.sample = sample
+        self.addHandler(
+            LOGS.handler(
+                LOG_FILE if not err else EXC_FILE,
+                _BOT_FILE_FORMAT,
+                _BOT_CONSOLE_FORMAT,
+            )
         )
-        file_handle.setLevel(logging.INFO)
-        self.addHandler(file_handle)
-        self.addHandler(console_hndl)
+
+    def kv(self, event: str, level: int = logging.DEBUG, **fields: Any):
+        """Structured record for hot paths
+
+        Always kept in `RECENT`, only a `sample` share of the calls is
+        written to the log as `event key=value ...`.
+        """
+        RECENT.append(self.name, event, fields)
+        if (self.sample >= 1.0 or random.random() < self.sample) and self.isEnabledFor(
+            level
+        ):
+            self._log(level, "%s %s", (event, _pairs(fields)))
@@ -1 +1,4 @@
+from .author_index import *
 from .ga_model import *
+from .participants import *
+from .store import *
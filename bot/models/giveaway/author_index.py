@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+
+import discord
+
+from ...logs.custom_logger import BotLogger
+from ...utils.database import BatchWriter, execute_script
+from .store import SCHEMA
+
+__all__ = ("AuthorIndex", "AUTHOR_INDEX", "DATA_CHANNEL_ID")
+
+DATA_CHANNEL_ID = 1097850451589865522
+_log = BotLogger("[AUTHOR INDEX]")
+
+
+class AuthorIndex:
+    """Author id to message ids of one channel, kept in sqlite
+
+    Built once by a backfill that resumes after the last indexed
+    message, then maintained from message events, so looking up the
+    messages of a few authors is a keyed query.
+    """
+
+    def __init__(self, channel_id: int, interval: float = 5.0) -> None:
+        self.channel_id = channel_id
+        # links point into the guild of the indexed channel, known once it is seen
+        self.guild_id: int | None = None
+        self.writer = BatchWriter(interval)
+        # live messages only move the watermark once the backfill caught up
+        self.ready = False
+
+    def _advance(self, message_id: int):
+        self.writer.add(
+            "INSERT INTO author_index_state VALUES (?, ?) "
+            + "ON CONFLICT (channel_id) DO UPDATE "
+            + "SET last_message_id = MAX(last_message_id, excluded.last_message_id)",
+            (self.channel_id, message_id),
+        )
+
+    def _insert(self, messages: Iterable[discord.Message]):
+        self.writer.extend(
+            "INSERT OR IGNORE INTO author_messages VALUES (?, ?, ?)",
+            ((self.channel_id, msg.author.id, msg.id) for msg in messages),
+        )
+
+    async def backfill(self, channel: discord.TextChannel, batch: int = 500):
+        self.guild_id = channel.guild.id
+        conn = await execute_script(SCHEMA)
+        async with conn.execute(
+            "SELECT last_message_id FROM author_index_state WHERE channel_id = ?",
+            (self.channel_id,),
+        ) as cursor:
+            row = await cursor.fetchone()
+        after = discord.Object(row["last_message_id"]) if row else None
+        pending: List[discord.Message] = []
+        total = 0
+        try:
+            async for msg in channel.history(
+                limit=None, after=after, oldest_first=True
+            ):
+                pending.append(msg)
+                if len(pending) >= batch:
+                    total += self._flush_backfill(pending)
+                    pending = []
+        except discord.Forbidden:
+            _log.warning("Cannot read history of %i", self.channel_id)
+        total += self._flush_backfill(pending)
+        await self.writer.flush()
+        self.ready = True
+        _log.info("Backfilled %i messages of %i", total, self.channel_id)
+
+    def _flush_backfill(self, messages: List[discord.Message]):
+        if messages:
+            self._insert(messages)
+            self._advance(messages[-1].id)
+        return len(messages)
+
+    def add(self, message: discord.Message):
+        if message.channel.id != self.channel_id:
+            return
+        self._insert((message,))
+        if self.ready:
+            self._advance(message.id)
+
+    def remove(self, channel_id: int, message_ids: Iterable[int]):
+        if channel_id != self.channel_id:
+            return
+        self.writer.extend(
+            "DELETE FROM author_messages WHERE channel_id = ? AND message_id = ?",
+            ((self.channel_id, message_id) for message_id in message_ids),
+        )
+
+    async def lookup(self, author_ids: Iterable[int]) -> Dict[int, List[int]]:
+        """Message ids per author, oldest first"""
+        author_ids = list(author_ids)
+        if not author_ids:
+            return {}
+        if not self.ready:
+            _log.warning("Author index lookup before backfill finished")
+        await self.writer.flush()
+        conn = await execute_script(SCHEMA)
+        found: Dict[int, List[int]] = {}
+        marks = ", ".join("?" * len(author_ids))
+        async with conn.execute(
+            "SELECT author_id, message_id FROM author_messages "
+            + f"WHERE channel_id = ? AND author_id IN ({marks}) ORDER BY message_id",
+            (self.channel_id, *author_ids),
+        ) as cursor:
+            async for row in cursor:
+                found.setdefault(row["author_id"], []).append(row["message_id"])
+        return found
+
+    async def jump_urls(self, author_ids: Iterable[int]):
+        if self.guild_id is None:
+            _log.warning("Data channel %i was never seen, no links", self.channel_id)
+            return {}
+        return {
+            author: [
+                f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{msg}"
+                for msg in messages
+            ]
+            for author, messages in (await self.lookup(author_ids)).items()
+        }
+
+
+AUTHOR_INDEX = AuthorIndex(DATA_CHANNEL_ID)
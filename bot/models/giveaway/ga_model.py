@@ -1,28 +1,27 @@
 from __future__ import annotations
 
-import asyncio
-from datetime import datetime
-from random import randrange, shuffle
+import secrets
+from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
 import discord
 from discord.ui import View, button
 
 from ...logs.custom_logger import BotLogger
+from ...utils.check import is_admin
+from ...utils.edits import EDITS
+from ...utils.scheduler import SCHEDULER, Timer
+from .author_index import AUTHOR_INDEX
+from .participants import ParticipantRegistry, WinnerDraw
+from .store import GIVEAWAYS, GiveawayRecord
 
 if TYPE_CHECKING:
     from ...bot import NhCord
 
-_log = BotLogger("[GIVEAWAY]")
-
-
-async def get_users_data(bot: NhCord, ids: list[int]):
-    channel = bot.get_channel(1097850451589865522)
-    if not isinstance(channel, discord.TextChannel):
-        raise ValueError("Text channel not found!")
-    async for msg in channel.history(oldest_first=True, limit=None):
-        if msg.author.id in ids:
-            yield msg
+# clicks are logged for one in a hundred, all of them stay in the ring buffer
+_log = BotLogger("[GIVEAWAY]", sample=0.01)
+# how long reroll stays available after the giveaway ended
+REROLL_WINDOW = timedelta(hours=2)
 
 
 class GiveawayView(View):
@@ -31,18 +30,24 @@ class GiveawayView(View):
         bot: NhCord,
         winners: int,
         role: discord.Role | None,
-        timeout: float,
         deadline: datetime,
+        giveaway_id: str | None = None,
     ):
-        super().__init__(timeout=timeout + 60 * 60 * 2, disable_on_timeout=True)
+        # persistent, the reroll window is handled by `expiry`
+        super().__init__(timeout=None)
+        self.giveaway_id = giveaway_id or secrets.token_hex(4)
+        for name in ("participate", "reroll", "participant_btn"):
+            getattr(self, name).custom_id = f"giveaway:{self.giveaway_id}:{name}"
         self.role = role
-        self.participants: list[discord.Member] = []
-        self.winners: list[discord.Member] = []
-        self.total_paarticipants = 0
+        self.participants = ParticipantRegistry()
+        self.winners: list[int] = []
+        self.draw: WinnerDraw | None = None
         self.ended = False
         self.max_winner = winners
         self.bot = bot
         self.deadline = deadline
+        self.timer: Timer | None = None
+        self.expiry: Timer | None = None
         self.reroll_select: discord.ui.Select[GiveawayView] = discord.ui.Select(
             discord.ComponentType.string_select,
             placeholder="Select user to reroll",
@@ -52,6 +57,11 @@ class GiveawayView(View):
     async def participate(self, _, interaction: discord.Interaction):
         if not isinstance(interaction.user, discord.Member):
             return
+        if self.ended:
+            # the draw is a permutation of the registry, it must not change now
+            return await interaction.response.send_message(
+                "Giveaway has ended", ephemeral=True
+            )
         if (
             self.role
             and isinstance(interaction.user, discord.Member)
@@ -60,32 +70,45 @@ class GiveawayView(View):
             return await interaction.response.send_message(
                 "Does not met role requirement", ephemeral=True
             )
-        if interaction.user in self.participants:
+        added = self.participants.add(interaction.user.id)
+        _log.kv(
+            "participate",
+            giveaway=self.giveaway_id,
+            member=interaction.user.id,
+            added=added,
+        )
+        if not added:
             return await interaction.response.send_message(
                 "Already participated", ephemeral=True
             )
-        self.participants.append(interaction.user)
+        GIVEAWAYS.add_participant(self.giveaway_id, interaction.user.id)
         await interaction.response.send_message(
             "Succesfully participated", ephemeral=True
         )
-        self.total_paarticipants += 1
+        if self.message and not self.ended:
+            EDITS.mark_dirty(self.message, self.render_participants)
 
     @button(label="reroll", style=discord.ButtonStyle.success)
     async def reroll(self, _, interaction: discord.Interaction):
         if not isinstance(interaction.user, discord.Member):
             return
+        if not is_admin(interaction.user):
+            return await interaction.response.send_message(
+                "Only admins can reroll", ephemeral=True
+            )
         if not self.ended:
             return await interaction.response.send_message(
                 "Giveaway is still running", ephemeral=True
             )
-        if not self.participants:
+        if not self.draw or not self.draw.remaining or not self.winners:
             return await interaction.response.send_message(
                 "Insufficient participants to reroll!", ephemeral=True
             )
         self.reroll_select.options = [
-            discord.SelectOption(label=str(winner), value=str(winner.id))
+            discord.SelectOption(label=self.display_name(winner), value=str(winner))
             for winner in self.winners
         ]
+        self.reroll_select.max_values = len(self.winners)
         self.reroll_select.callback = self.reroll_action  # type: ignore
         view = View(self.reroll_select)
         await interaction.response.send_message(
@@ -94,80 +117,161 @@ class GiveawayView(View):
 
     @button(label="participants: 0", style=discord.ButtonStyle.gray)
     async def participant_btn(self, _, interaction: discord.Interaction):
-        if not interaction.user in self.participants:
+        if not interaction.user or interaction.user.id not in self.participants:
             return await interaction.response.send_message(
                 "You have not participated", ephemeral=True
             )
         await interaction.response.send_message(
-            f"You have participated among {self.total_paarticipants} participants",
+            f"You have participated among {len(self.participants)} participants",
             ephemeral=True,
         )
 
     async def get_winners(self):
-        if not self.message:
+        if not self.message or not self.message.guild:
             raise ValueError("Message not found!")
         self.ended = True
+        self.draw = WinnerDraw(self.participants, secrets.randbits(63))
+        winners = self.draw.take(self.max_winner)
+        return winners, await self.winner_embed(winners)
+
+    async def winner_embed(self, winners: list[int]):
+        if not self.message or not self.message.guild:
+            raise ValueError("Message not found!")
         embed = self.message.embeds[0]
-        shuffle(self.participants)
-        winners = [
-            self.participants.pop(randrange(len(self.participants)))
-            for _ in range(min(self.max_winner, self.total_paarticipants))
-        ]
-        winner_map: dict[int, list[discord.Message]] = {}
-        async for message in get_users_data(
-            self.bot, [winner.id for winner in winners]
-        ):
-            if not message:
-                continue
-            if message.author.id not in winner_map:
-                winner_map.update({message.author.id: []})
-            winner_map[message.author.id].append(message.jump_url)
+        winner_map = await AUTHOR_INDEX.jump_urls(winners)
         embed.description = "Winners:\n" + "\n".join(
-            f"{winner.mention}: {winner_map[winner.id]}" for winner in winners
+            f"<@{winner}>: {winner_map.get(winner, [])}" for winner in winners
         )
-        return winners, embed
+        return embed
+
+    def display_name(self, user_id: int):
+        member = self.message.guild.get_member(user_id) if self.message else None
+        return str(member) if member else str(user_id)
 
     async def reroll_action(self, interaction: discord.Interaction):
-        await interaction.response.send_message("selected", ephemeral=True)
-        print(self.reroll_select.values)
+        if not isinstance(interaction.user, discord.Member) or not is_admin(
+            interaction.user
+        ):
+            return await interaction.response.send_message(
+                "Only admins can reroll", ephemeral=True
+            )
+        selected = [int(value) for value in self.reroll_select.values]  # type: ignore
+        await interaction.response.defer(ephemeral=True)
+        rerolled = await self.roll(selected)
+        await interaction.followup.send(
+            f"Rerolled {len(rerolled)} of {len(selected)} winners"
+            if rerolled
+            else "No participants left to reroll",
+            ephemeral=True,
+        )
 
-    async def start_timer(self):
+    def start_timer(self):
         if not self.message:
             raise ValueError("Message not found!")
-        asyncio.create_task(self.reload_participants())
+        if self.ended:
+            self.expiry = SCHEDULER.call_at(
+                self.deadline + REROLL_WINDOW, self.expire, name="giveaway expiry"
+            )
+            return
         _log.info("Starting giveaway timer!")
-        while datetime.now() < self.deadline:
-            await asyncio.sleep(1)
-        await self.roll()
+        self.timer = SCHEDULER.call_at(self.deadline, self.roll, name="giveaway")
 
-    async def reload_participants(self):
-        for children in self.children:
-            if (
-                isinstance(children, discord.ui.Button)
-                and children.label is not None
-                and "participants:" in children.label
-            ):
-                total_entries_btn = children
-                break
-        else:
-            return
-        while not self.ended:
-            total_entries_btn.label = f"Participants: {self.total_paarticipants}"
+    async def expire(self):
+        self.disable_all_items()
+        self.stop()
+        if self.message:
             await self.message.edit(view=self)
-            await asyncio.sleep(10)
+
+    async def save(self):
+        if not self.message or not self.message.guild:
+            raise ValueError("Message not found!")
+        await GIVEAWAYS.create(
+            GiveawayRecord(
+                self.giveaway_id,
+                self.message.guild.id,
+                self.message.channel.id,
+                self.message.id,
+                self.role.id if self.role else None,
+                self.max_winner,
+                self.deadline,
+            )
+        )
+
+    @classmethod
+    async def restore(cls, bot: NhCord, record: GiveawayRecord):
+        """Rebuild a view from the store, the message is fetched directly"""
+        guild = bot.get_guild(record.guild_id)
+        if not guild:
+            return None
+        view = cls(
+            bot,
+            record.max_winner,
+            guild.get_role(record.role_id) if record.role_id else None,
+            record.deadline,
+            record.giveaway_id,
+        )
+        view.participants = ParticipantRegistry(record.participants)
+        view.winners = record.winners
+        view.ended = record.ended
+        if record.draw_seed is not None:
+            view.draw = WinnerDraw(view.participants, record.draw_seed, record.drawn)
+        try:
+            view.message = await bot.get_partial_messageable(
+                record.channel_id
+            ).fetch_message(record.message_id)
+        except discord.NotFound:
+            _log.warning("Giveaway message %i was deleted", record.message_id)
+            await GIVEAWAYS.delete(record.giveaway_id)
+            return None
+        if view.ended:
+            view.participate.disabled = True
+        return view
+
+    def render_participants(self):
+        self.participant_btn.label = f"Participants: {len(self.participants)}"
+        return len(self.participants), {"view": self}
+
+    async def reroll_winners(self, to_reroll: list[int]):
+        """Replace the selected winners with the next unused draws"""
+        if not self.message or not self.draw:
+            raise ValueError("Giveaway has not been drawn!")
+        to_reroll = [winner for winner in to_reroll if winner in self.winners]
+        replacements = self.draw.take(len(to_reroll))
+        if not replacements:
+            return replacements
+        swap = dict(zip(to_reroll, replacements))
+        self.winners = [swap.get(winner, winner) for winner in self.winners]
+        GIVEAWAYS.set_winners(self.giveaway_id, self.winners)
+        GIVEAWAYS.set_draw(self.giveaway_id, self.draw.seed, self.draw.cursor)
+        _log.info("Rerolled %i winners", len(replacements))
+        await self.message.edit(embed=await self.winner_embed(self.winners))
+        mentions = ", ".join(f"<@{winner}>" for winner in replacements)
+        await self.message.reply(
+            f"Congratulations {mentions} you have won the Giveaway reroll"
+        )
+        return replacements
 
     async def roll(self, to_reroll: None | list[int] = None):
         if to_reroll:
-            return
+            return await self.reroll_winners(to_reroll)
+        if self.timer:
+            self.timer.cancel()
         if not self.message:
             raise ValueError("Message not found!")
         self.ended = True
+        EDITS.forget(self.message)
+        self.render_participants()
         embed = self.message.embeds[0]
-        if self.total_paarticipants < 1:
+        if not self.participants:
             self.disable_all_items()
+            self.stop()
+            GIVEAWAYS.end(self.giveaway_id)
             embed.description = "No participants"
             _log.warning("Giveaway ended with no participant")
             return await self.message.edit(view=self, embed=embed)
+        self.expiry = SCHEDULER.call_at(
+            REROLL_WINDOW.total_seconds(), self.expire, name="giveaway expiry"
+        )
         for children in self.children:
             if (
                 isinstance(children, discord.ui.Button)
@@ -179,13 +283,12 @@ class GiveawayView(View):
             return self.disable_all_items()
         participate_btn.disabled = True
 
-        try:
-            self.winners, embed = await self.get_winners()
-        except discord.Forbidden:
-            await self.message.edit(view=self)
-            return await self.message.reply("I cannot read data channel")
+        self.winners, embed = await self.get_winners()
+        GIVEAWAYS.set_winners(self.giveaway_id, self.winners)
+        if self.draw:
+            GIVEAWAYS.set_draw(self.giveaway_id, self.draw.seed, self.draw.cursor)
         await self.message.edit(view=self, embed=embed)
-        mentions = ", ".join(winner.mention for winner in self.winners)
+        mentions = ", ".join(f"<@{winner}>" for winner in self.winners)
         await self.message.reply(
             f"Congratulations {mentions} you have won the Giveaway"
         )
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import random
+from array import array
+from typing import Iterable, Iterator
+
+__all__ = ("ParticipantRegistry", "WinnerDraw")
+
+
+class ParticipantRegistry:
+    """Member ids of a giveaway in a hash set plus an insertion ordered array
+
+    Membership is a set lookup, the array keeps 8 bytes per entry in
+    participation order and is what `WinnerDraw` picks winners from.
+    """
+
+    __slots__ = ("_ids", "_order")
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        self._ids: set[int] = set()
+        self._order = array("Q")
+        for user_id in ids:
+            self.add(user_id)
+
+    def add(self, user_id: int):
+        """Register an id, returns False if it already participated"""
+        if user_id in self._ids:
+            return False
+        self._ids.add(user_id)
+        self._order.append(user_id)
+        return True
+
+    def __contains__(self, user_id: object):
+        return user_id in self._ids
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._order)
+
+    def __getitem__(self, index: int) -> int:
+        return self._order[index]
+
+
+class WinnerDraw:
+    """A random permutation of participant positions, consumed front to back
+
+    Built once when the giveaway ends. Winners are the first positions
+    and every reroll takes the next unused ones, so a reroll costs O(k)
+    and nobody drawn before is drawn again. The permutation is derived
+    from `seed`, storing it with `cursor` restores the same draw.
+    """
+
+    __slots__ = ("registry", "seed", "cursor", "_order")
+
+    def __init__(self, registry: ParticipantRegistry, seed: int, cursor: int = 0):
+        self.registry = registry
+        self.seed = seed
+        self.cursor = cursor
+        self._order = array("L", range(len(registry)))
+        random.Random(seed).shuffle(self._order)
+
+    @property
+    def remaining(self):
+        return len(self._order) - self.cursor
+
+    def take(self, k: int) -> list[int]:
+        """Next `k` unused participants, fewer once the permutation runs out"""
+        end = min(self.cursor + k, len(self._order))
+        drawn = [self.registry[index] for index in self._order[self.cursor : end]]
+        self.cursor = end
+        return drawn
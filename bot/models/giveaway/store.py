@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, List
+
+from ...utils.database import BatchWriter, execute_script
+
+__all__ = ("GiveawayRecord", "GiveawayStore", "GIVEAWAYS")
+
+SCHEMA = Path("bot/data/giveaway/giveaway.sql")
+
+
+@dataclass
+class GiveawayRecord:
+    giveaway_id: str
+    guild_id: int
+    channel_id: int
+    message_id: int
+    role_id: int | None
+    max_winner: int
+    deadline: datetime
+    ended: bool = False
+    participants: List[int] = field(default_factory=list)
+    winners: List[int] = field(default_factory=list)
+    draw_seed: int | None = None
+    drawn: int = 0
+
+
+class GiveawayStore:
+    """Giveaways persisted to sqlite with write-behind batching
+
+    Clicks only append to the buffer, participants, winners and end
+    state reach the database once per flush interval.
+    """
+
+    def __init__(self, interval: float = 5.0) -> None:
+        self.writer = BatchWriter(interval)
+
+    async def create(self, record: GiveawayRecord):
+        await execute_script(SCHEMA)
+        self.writer.add(
+            "INSERT OR REPLACE INTO giveaways VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record.giveaway_id,
+                record.guild_id,
+                record.channel_id,
+                record.message_id,
+                record.role_id,
+                record.max_winner,
+                record.deadline.timestamp(),
+                int(record.ended),
+            ),
+        )
+        await self.writer.flush()
+
+    def add_participant(self, giveaway_id: str, user_id: int):
+        self.writer.add(
+            "INSERT OR IGNORE INTO giveaway_participants VALUES (?, ?)",
+            (giveaway_id, user_id),
+        )
+
+    def set_winners(self, giveaway_id: str, winners: Iterable[int]):
+        self.writer.add(
+            "DELETE FROM giveaway_winners WHERE giveaway_id = ?", (giveaway_id,)
+        )
+        self.writer.extend(
+            "INSERT OR IGNORE INTO giveaway_winners VALUES (?, ?)",
+            ((giveaway_id, winner) for winner in winners),
+        )
+        self.end(giveaway_id)
+
+    def set_draw(self, giveaway_id: str, seed: int, drawn: int):
+        self.writer.add(
+            "INSERT OR REPLACE INTO giveaway_draws VALUES (?, ?, ?)",
+            (giveaway_id, seed, drawn),
+        )
+
+    def end(self, giveaway_id: str):
+        self.writer.add(
+            "UPDATE giveaways SET ended = 1 WHERE giveaway_id = ?", (giveaway_id,)
+        )
+
+    async def load(self, keep_ended: timedelta):
+        """Load running giveaways and ended ones still inside `keep_ended`"""
+        conn = await execute_script(SCHEMA)
+        since = (datetime.now() - keep_ended).timestamp()
+        records: dict[str, GiveawayRecord] = {}
+        async with conn.execute(
+            "SELECT * FROM giveaways WHERE ended = 0 OR deadline > ?", (since,)
+        ) as cursor:
+            async for row in cursor:
+                records[row["giveaway_id"]] = GiveawayRecord(
+                    row["giveaway_id"],
+                    row["guild_id"],
+                    row["channel_id"],
+                    row["message_id"],
+                    row["role_id"],
+                    row["max_winner"],
+                    datetime.fromtimestamp(row["deadline"]),
+                    bool(row["ended"]),
+                )
+        if not records:
+            return []
+        marks = ", ".join("?" * len(records))
+        for table, attr in (
+            ("giveaway_participants", "participants"),
+            ("giveaway_winners", "winners"),
+        ):
+            async with conn.execute(
+                f"SELECT giveaway_id, user_id FROM {table} "
+                + f"WHERE giveaway_id IN ({marks}) ORDER BY rowid",
+                tuple(records),
+            ) as cursor:
+                async for row in cursor:
+                    getattr(records[row["giveaway_id"]], attr).append(row["user_id"])
+        async with conn.execute(
+            f"SELECT * FROM giveaway_draws WHERE giveaway_id IN ({marks})",
+            tuple(records),
+        ) as cursor:
+            async for row in cursor:
+                record = records[row["giveaway_id"]]
+                record.draw_seed, record.drawn = row["seed"], row["drawn"]
+        return list(records.values())
+
+    async def delete(self, giveaway_id: str):
+        for table in (
+            "giveaways",
+            "giveaway_participants",
+            "giveaway_winners",
+            "giveaway_draws",
+        ):
+            self.writer.add(
+                f"DELETE FROM {table} WHERE giveaway_id = ?", (giveaway_id,)
+            )
+        await self.writer.flush()
+
+
+GIVEAWAYS = GiveawayStore()
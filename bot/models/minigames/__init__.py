@@ -1,4 +1,5 @@
 # pylint: disable all
 from .base import *
 from .bridge_game import *
+from .questions import *
 from .redgreen_game import *
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional, Sequence
 
@@ -11,7 +10,10 @@ from discord.ui import Button, View
 
 from bot.logs.custom_logger import BotLogger
 
-from ...utils.minigames.minigames_utils import TIMELEFT
+from ...utils.edits import EDITS
+from ...utils.minigames.events import GAME_LOG, GameEvent, GameKind
+from ...utils.minigames.minigames_utils import TIMELEFT, grid_shape
+from ...utils.scheduler import SCHEDULER, Timer
 
 # from bot.utils.check import is_admin
 
@@ -22,11 +24,14 @@ if TYPE_CHECKING:
     from ...data.minigames import BridgeGameSettings
 
 __all__ = ("BridgeGameView", "BridgeGameChoose")
+# switch clicks only change the turn text, coalesce them per second
+TURN_EDIT_WINDOW = 1.0
 THUMBNAIL_URL = (
     "https://www.vsomglass.com/wp-content/uploads/2021/10/SQUID-GAME-GLASS-BRIDGE-1.jpg"
 )
 
-_log = BotLogger("[MG BRIDGE]")
+# clicks are logged for one in twenty, all of them stay in the ring buffer
+_log = BotLogger("[MG BRIDGE]", sample=0.05)
 
 
 class BridgeGameButton(Button["BridgeGameView"]):
@@ -62,8 +67,11 @@ class BridgeGameButton(Button["BridgeGameView"]):
                 "This button is not for you!", ephemeral=True
             )
         turn = self.view.settings.turn
-        _log.info("%s Pressed %i", turn.name, int(self.label or 1))
-        if self.view.settings.safe_point == int(self.label or 1) - 1:
+        panel = int(self.label or 1)
+        safe = self.view.settings.safe_point == panel - 1
+        self.view.record(GameEvent.CLICK, turn.id, panel if safe else -panel)
+        _log.kv("press", member=turn.id, panel=panel, safe=safe)
+        if safe:
             await interaction.response.send_message("You have success!", ephemeral=True)
             await self.view.new_segment()
         else:
@@ -135,22 +143,21 @@ class BridgeGameView(View):
         self.disabled = False
         self.invoker = invoker
         self.channel = channel
-        idx = 1
-        for row in range(1, 3):
-            for col in range(1, 4):
-                btn = BridgeGameButton(
-                    label=str(idx) if col % 2 else "-",
-                    # custom_id=str(idx) if col % 2 else None,
-                    custom_id=None,
-                    row=row,
-                    disabled=not (col % 2),
-                )
-                if col % 2:
-                    idx += 1
-                    self.childs.append(btn)
-                self.add_item(btn)
+        self.timer: Optional[Timer] = None
+        self.game_id = GAME_LOG.new_game()
+        self.record(GameEvent.START, channel.id, len(settings.players) + 1)
+        rows, cols = grid_shape(settings.panels)
+        for idx in range(settings.panels):
+            btn = BridgeGameButton(
+                label=str(idx + 1),
+                custom_id=None,
+                row=idx // cols,
+            )
+            self.childs.append(btn)
+            self.add_item(btn)
+        # a full 5x5 grid leaves no room, MAX_PANELS keeps one slot free
         switch_btn: Button["BridgeGameView"] = Button(
-            style=discord.ButtonStyle.success, label="Switch Turn", row=3
+            style=discord.ButtonStyle.success, label="Switch Turn", row=min(rows, 4)
         )
         switch_btn.callback = self.check_switch  # type: ignore
         self.childs.append(switch_btn)  # type: ignore
@@ -166,15 +173,17 @@ class BridgeGameView(View):
     #         )
     #     await self.done()
 
+    def record(self, event: GameEvent, member: int = 0, value: int = 0):
+        GAME_LOG.record(self.game_id, GameKind.BRIDGE, event, member, value)
+
     async def check_switch(self, interaction: Interaction):
         if interaction.user != self.settings.turn:
             return await interaction.response.send_message(
                 "You cannot perform this action", ephemeral=True
             )
+        self.record(GameEvent.SWITCH, self.settings.turn.id)
         await self.switch_turn(None)
-        _log.info(
-            "%s is switching turn to %s", interaction.user.name, self.settings.turn.name
-        )
+        _log.kv("switch", member=interaction.user.id, turn=self.settings.turn.id)
         await interaction.response.send_message(
             f"Switched turn to {self.settings.turn}", ephemeral=True
         )
@@ -184,9 +193,12 @@ class BridgeGameView(View):
             _log.warning("message were not found!")
             return
         # self.disable_all_items()
-        file, embed = self.settings.generate_image(reveal=True)
+        EDITS.forget(self.msg)
+        file, embed = await self.settings.generate_image(reveal=True)
         await self.msg.edit(file=file, embed=embed, view=None)
         self.settings.segment += 1
+        self.record(GameEvent.SEGMENT, self.settings.turn.id, self.settings.segment)
+        _log.kv("segment", segment=self.settings.segment, turn=self.settings.turn.id)
         if self.settings.segment > self.settings.segments:
             return await self.done()
         # view = BridgeGameView(
@@ -195,7 +207,7 @@ class BridgeGameView(View):
         for child in self.childs:
             child.disabled = False
         self.settings.move_segments()
-        file, embed = self.settings.generate_image()
+        file, embed = await self.settings.generate_image()
         self.msg = await self.channel.send(
             content=TIMELEFT.format(time=round(self.deadline.timestamp()))
             + f"{self.settings.turn.mention}'s turn",
@@ -208,25 +220,32 @@ class BridgeGameView(View):
         if not self.msg:
             _log.warning("message were not found!")
             return
+        if click_point is not None:
+            self.record(GameEvent.ELIMINATE, self.settings.turn.id)
         try:
             await self.settings.new_turn(click_point)
         except ValueError:
             return await self.done()
-        kwargs = {}
-        if click_point is not None:
-            file, embed = self.settings.generate_image(reveal=False)
-            kwargs.update({"file": file})
-            kwargs.update({"embed": embed})
-        await self.msg.edit(
-            content=TIMELEFT.format(time=round(self.deadline.timestamp()))
+        self.record(GameEvent.TURN, self.settings.turn.id)
+        if click_point is None:
+            return EDITS.mark_dirty(self.msg, self.render_turn, TURN_EDIT_WINDOW)
+        EDITS.forget(self.msg)
+        file, embed = await self.settings.generate_image(reveal=False)
+        await self.msg.edit(file=file, embed=embed, **self.render_turn()[1])
+
+    def render_turn(self):
+        return self.settings.turn.id, {
+            "content": TIMELEFT.format(time=round(self.deadline.timestamp()))
             + f"{self.settings.turn.mention}'s turn",
-            view=self,
-            **kwargs,
-        )
+            "view": self,
+        }
 
     async def done(self):
+        if self.timer:
+            self.timer.cancel()
         if self.msg and not self.disabled:
             self.stop()
+            EDITS.forget(self.msg)
             _log.info("Game done!")
             self.disabled = True
             kill = self.settings.segment <= self.settings.segments
@@ -268,14 +287,12 @@ class BridgeGameView(View):
                 embed=emb,
             )
             self.settings.running = False
+            self.record(GameEvent.END, value=len(players))
             if kill:
                 await self.settings.assign_role("failed")
             else:
                 await self.settings.assign_role("winner")
                 await self.settings.assign_role("loser")
 
-    async def start_timer(self):
-        while datetime.now() < self.deadline and not self.disabled:
-            await asyncio.sleep(1)
-        _log.info("Timer disabled")
-        await self.done()
+    def start_timer(self):
+        self.timer = SCHEDULER.call_at(self.deadline, self.done, name="bridge game")
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import csv
+import io
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from string import ascii_uppercase
+from typing import Dict, List, Tuple
+
+from ...logs.custom_logger import BotLogger
+from ...utils.database import BatchWriter, execute_script
+from .redgreen_game import RGQuestion, normalize
+
+__all__ = ("ImportReport", "QuestionBank", "QuestionDeck", "QUESTIONS")
+
+SCHEMA = Path("bot/data/minigames/minigames.sql")
+ESSAY = "No choices, guess it yourself (essay)"
+# questions are shown as an embed description
+MAX_RENDERED = 4096
+_log = BotLogger("[QUESTIONS]")
+
+
+@dataclass
+class ImportReport:
+    name: str
+    imported: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    def summary(self, shown: int = 10):
+        lines = [f"Imported {self.imported} questions into **{self.name}**"]
+        if self.errors:
+            lines.append(f"Skipped {len(self.errors)} lines:")
+            lines.extend(f"line {line}: {error}" for line, error in self.errors[:shown])
+            if len(self.errors) > shown:
+                lines.append(f"... and {len(self.errors) - shown} more")
+        return "\n".join(lines)
+
+
+def validate(row: List[str]) -> str | None:
+    """Why a parsed csv row is not a question, None when it is one"""
+    if len(row) not in (2, 3):
+        return f"expected question,answer[,choices] but found {len(row)} fields"
+    quest, answer, *rest = (value.strip() for value in row)
+    if not quest:
+        return "empty question"
+    if not answer:
+        return "empty answer"
+    choices = rest[0] if rest else ""
+    if choices.find("||") > 0:
+        options = choices.split("||")
+        letters = ascii_uppercase[: len(options)]
+        if not (
+            (len(answer) == 1 and answer.upper() in letters)
+            or normalize(answer) in {normalize(option) for option in options}
+        ):
+            return f"answer {answer!r} is neither a choice letter nor a choice"
+    if len(RGQuestion(quest, answer, choices or ESSAY).rendered) > MAX_RENDERED:
+        return "question and choices are too long"
+    return None
+
+
+def parse_csv(content: bytes, report: ImportReport) -> List[Tuple[str, str, str]]:
+    """Valid (question, answer, choices) rows, the others go to `report`
+
+    An unreadable file yields nothing, a half read one would silently
+    shrink the set it replaces.
+    """
+    seen: Dict[str, int] = {}
+    rows: List[Tuple[str, str, str]] = []
+    reader = csv.reader(
+        io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig", newline="")
+    )
+    try:
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue
+            error = validate(row)
+            key = normalize(row[0]) if not error else ""
+            if not error and key in seen:
+                error = f"duplicate of line {seen[key]}"
+            if error:
+                report.errors.append((reader.line_num, error))
+                continue
+            seen[key] = reader.line_num
+            quest, answer, *rest = (value.strip() for value in row)
+            rows.append((quest, answer, rest[0] if rest else ""))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        report.errors.append((reader.line_num + 1, f"unreadable: {exc}"))
+        return []
+    return rows
+
+
+class QuestionDeck:
+    """Question ids of one game shuffled once, drawing pops the next one"""
+
+    def __init__(self, bank: QuestionBank, ids: List[int], tolerance: int = 0):
+        self.bank = bank
+        self.ids = ids
+        self.tolerance = tolerance
+        random.shuffle(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    async def draw(self):
+        while self.ids:
+            question = await self.bank.fetch(self.ids.pop(), self.tolerance)
+            # the set may have been replaced while the game runs
+            if question:
+                return question
+        return None
+
+
+class QuestionBank:
+    """Named question sets per guild kept in sqlite
+
+    Imports parse the uploaded csv row by row, rows that fail
+    validation are reported by line and the rest replace the set in a
+    single transaction.
+    """
+
+    def __init__(self) -> None:
+        self.writer = BatchWriter()
+
+    async def import_csv(self, guild_id: int, name: str, content: bytes):
+        await execute_script(SCHEMA)
+        report = ImportReport(name)
+        rows = [(guild_id, name, *row) for row in parse_csv(content, report)]
+        report.imported = len(rows)
+        if rows:
+            self.writer.add(
+                "DELETE FROM questions WHERE guild_id = ? AND set_name = ?",
+                (guild_id, name),
+            )
+            self.writer.add(
+                "INSERT OR REPLACE INTO question_sets VALUES (?, ?, ?)",
+                (guild_id, name, time.time()),
+            )
+            self.writer.extend(
+                "INSERT INTO questions (guild_id, set_name, question, answer, choices) "
+                + "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            await self.writer.flush()
+        _log.info(
+            "Imported %i questions into %s, %i lines skipped",
+            report.imported,
+            name,
+            len(report.errors),
+        )
+        return report
+
+    async def sets(self, guild_id: int) -> List[Tuple[str, int]]:
+        conn = await execute_script(SCHEMA)
+        async with conn.execute(
+            "SELECT name, COUNT(question_id) AS size FROM question_sets AS sets "
+            + "LEFT JOIN questions ON questions.guild_id = sets.guild_id "
+            + "AND set_name = name WHERE sets.guild_id = ? "
+            + "GROUP BY name ORDER BY name",
+            (guild_id,),
+        ) as cursor:
+            return [(row["name"], row["size"]) async for row in cursor]
+
+    async def delete(self, guild_id: int, name: str):
+        for table, column in (("question_sets", "name"), ("questions", "set_name")):
+            self.writer.add(
+                f"DELETE FROM {table} WHERE guild_id = ? AND {column} = ?",
+                (guild_id, name),
+            )
+        await self.writer.flush()
+
+    async def deck(self, guild_id: int, name: str, tolerance: int = 0):
+        conn = await execute_script(SCHEMA)
+        async with conn.execute(
+            "SELECT question_id FROM questions WHERE guild_id = ? AND set_name = ?",
+            (guild_id, name),
+        ) as cursor:
+            ids = [row["question_id"] async for row in cursor]
+        return QuestionDeck(self, ids, tolerance)
+
+    async def fetch(self, question_id: int, tolerance: int = 0):
+        conn = await execute_script(SCHEMA)
+        async with conn.execute(
+            "SELECT question, answer, choices FROM questions WHERE question_id = ?",
+            (question_id,),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if not row:
+            return None
+        return RGQuestion(
+            row["question"], row["answer"], row["choices"] or ESSAY, tolerance
+        )
+
+
+QUESTIONS = QuestionBank()
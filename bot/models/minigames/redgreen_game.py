@@ -1,71 +1,250 @@
 from __future__ import annotations
 
-import asyncio
+import heapq
+import sys
+import time
+import unicodedata
+from array import array
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import TYPE_CHECKING
+from datetime import timedelta
+from string import ascii_uppercase
+from typing import (TYPE_CHECKING, Dict, FrozenSet, Iterable, Iterator, List,
+                    Set, Tuple)
 
 import discord
-from discord import Member
 
 from bot.logs.custom_logger import BotLogger
 
+from ...utils.minigames.events import GAME_LOG, GameEvent, GameKind
+from ...utils.router import ROUTER, Handler
+from ...utils.scheduler import SCHEDULER, Timer
+
 if TYPE_CHECKING:
     from ...data.minigames import RedGreenGameSettings
 
 
 _log = BotLogger("[RG MINIGAMES]")
+# seconds without a message until a player counts as afk
+AFK_LIMIT = timedelta(minutes=20).total_seconds()
+# width of an activity bucket, afk players are swept at most this late
+AFK_BUCKET = timedelta(minutes=1).total_seconds()
+
+
+def normalize(text: str):
+    """NFKC, casefold and collapsed whitespace, the form answers are compared in"""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def within_distance(first: str, second: str, limit: int):
+    """Whether the Levenshtein distance is at most `limit`
+
+    Only the diagonal band of width `2 * limit + 1` is computed and a
+    row that is over the limit everywhere stops early, O(limit * len).
+    """
+    if abs(len(first) - len(second)) > limit:
+        return False
+    if len(first) > len(second):
+        first, second = second, first
+    over = limit + 1
+    previous = [col if col <= limit else over for col in range(len(second) + 1)]
+    for row in range(1, len(first) + 1):
+        current = [over] * (len(second) + 1)
+        if row <= limit:
+            current[0] = row
+        for col in range(max(1, row - limit), min(len(second), row + limit) + 1):
+            current[col] = min(
+                previous[col] + 1,
+                current[col - 1] + 1,
+                previous[col - 1] + (first[row - 1] != second[col - 1]),
+                over,
+            )
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
 
 
 @dataclass
 class RGQuestion:
+    """A question compiled once into its matcher and rendered texts
+
+    An answer can be a choice letter or text, either one is accepted
+    when the other is written. `tolerance` allows that many typos on
+    text answers, letters always have to match exactly.
+    """
+
     quest: str
     answer: str
     choices: str = ""
+    tolerance: int = 0
+    options: List[str] = field(init=False)
+    accepted: FrozenSet[str] = field(init=False)
+    texts: Tuple[str, ...] = field(init=False)
+    rendered: str = field(init=False)
+    revealed: str = field(init=False)
 
+    def __post_init__(self):
+        self.options = self.choices.split("||") if self.choices.find("||") > 0 else []
+        letters = ascii_uppercase[: len(self.options)]
+        answer = normalize(self.answer)
+        index = letters.casefold().find(answer) if len(answer) == 1 else -1
+        if index < 0:
+            normalized = [normalize(option) for option in self.options]
+            index = normalized.index(answer) if answer in normalized else -1
+        accepted = {answer}
+        if index >= 0:
+            accepted |= {letters[index].casefold(), normalize(self.options[index])}
+            self.revealed = f"{letters[index]}. {self.options[index]}"
+        else:
+            self.revealed = self.answer
+        self.accepted = frozenset(accepted)
+        self.texts = tuple(text for text in accepted if len(text) > 1)
+        choices = (
+            "\n".join(
+                f"{letter}. {option}" for letter, option in zip(letters, self.options)
+            )
+            if self.options
+            else self.choices
+        )
+        self.rendered = f"**{self.quest}**\n{choices}"
 
-@dataclass
-class RGPlayerData:
-    author: Member
-    correct: int = 0
-    answered: bool = False
-    last_wrong: datetime | None = None
-    last_answer: str = ""
-    afk_counter: datetime = field(default=datetime.now())
-
-    def is_afk(self):
-        if (datetime.now() - self.afk_counter) > timedelta(minutes=20):
+    def matches(self, content: str):
+        answer = normalize(content)
+        if answer in self.accepted:
             return True
-        return False
+        # a single character is a letter pick, it never fuzzy matches a text
+        return self.tolerance > 0 and len(answer) > 1 and any(
+            within_distance(answer, text, self.tolerance) for text in self.texts
+        )
 
-    def valid_turn(self):
-        if self.answered:
-            return False
-        if self.last_wrong and (datetime.now() - self.last_wrong) < timedelta(
-            minutes=5
-        ):
-            print(f"{self.author} is on wrong cooldown!")
+
+class RGPlayerTable:
+    """Red/green players as columns indexed by a row per member id
+
+    `correct` and `answered` are arrays instead of a dataclass per
+    player. A player answered the current question when its row holds
+    the current `epoch`, so a new question is one increment. Members
+    are resolved from the guild when they are needed.
+
+    Activity is also filed into buckets of `AFK_BUCKET` seconds, so the
+    afk sweep pops whole expired buckets instead of checking everyone.
+    """
+
+    __slots__ = (
+        "guild",
+        "rows",
+        "ids",
+        "correct",
+        "answered",
+        "bucket",
+        "buckets",
+        "pending",
+        "epoch",
+    )
+
+    def __init__(self, guild: discord.Guild, member_ids: Iterable[int]) -> None:
+        self.guild = guild
+        member_ids = list(member_ids)
+        self.ids = array("Q", member_ids)
+        # keyed by the caller's int objects, not copies read back from the array
+        self.rows: Dict[int, int] = dict(zip(member_ids, range(len(member_ids))))
+        self.correct = array("I", bytes(4 * len(self.ids)))
+        self.answered = array("I", bytes(4 * len(self.ids)))
+        start = int(time.monotonic() // AFK_BUCKET)
+        self.bucket = array("q", [start]) * len(self.ids)
+        self.buckets: Dict[int, Set[int]] = {start: set(self.rows)} if self.rows else {}
+        # bucket numbers in age order, numbers of emptied buckets are skipped
+        self.pending: List[int] = list(self.buckets)
+        # rows start at epoch 0, the first question is epoch 1
+        self.epoch = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, member_id: object):
+        return member_id in self.rows
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self.rows))
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns and the row map"""
+        return sys.getsizeof(self.rows) + sum(
+            column.itemsize * len(column)
+            for column in (self.ids, self.correct, self.answered, self.bucket)
+        )
+
+    def new_question(self):
+        self.epoch += 1
+
+    def member(self, member_id: int):
+        return self.guild.get_member(member_id)
+
+    def correct_of(self, member_id: int):
+        return self.correct[self.rows[member_id]]
+
+    def has_answered(self, member_id: int):
+        return self.answered[self.rows[member_id]] == self.epoch
+
+    def touch(self, member_id: int):
+        """Reset the afk timer of a player"""
+        row = self.rows[member_id]
+        current = int(time.monotonic() // AFK_BUCKET)
+        if self.bucket[row] == current:
+            return
+        self._unfile(member_id, self.bucket[row])
+        self.bucket[row] = current
+        holders = self.buckets.get(current)
+        if holders is None:
+            holders = self.buckets[current] = set()
+            heapq.heappush(self.pending, current)
+        holders.add(member_id)
+
+    def _unfile(self, member_id: int, bucket: int):
+        holders = self.buckets.get(bucket)
+        if holders is not None:
+            holders.discard(member_id)
+            if not holders:
+                del self.buckets[bucket]
+
+    def expired(self, limit: float = AFK_LIMIT) -> List[int]:
+        """Pop the players of every bucket that went quiet for `limit`
+
+        A bucket expires once its newest possible activity is older than
+        `limit`, so the cost is the expired players, not the table.
+        """
+        # last bucket whose end is at least `limit` ago
+        last = int((time.monotonic() - limit) // AFK_BUCKET) - 1
+        expired: List[int] = []
+        while self.pending and self.pending[0] <= last:
+            holders = self.buckets.pop(heapq.heappop(self.pending), None)
+            if holders:
+                expired.extend(holders)
+        return expired
+
+    def remove(self, member_id: int):
+        """Drop a player, its row stays allocated until the game ends"""
+        row = self.rows.pop(member_id, None)
+        if row is None:
             return False
+        self._unfile(member_id, self.bucket[row])
         return True
 
-    async def validate_turn(self, msg: discord.Message, question: RGQuestion | None):
-        if not question:
-            return
-        # if self.answered:
-        #     emb = discord.Embed(
-        #         description=f"{msg.author.mention} already answered: {self.last_answer}",
-        #         color=discord.Color.blue(),
-        #     )
-        #     await msg.channel.send(embed=emb)
-        # await msg.delete()
-        # if not self.answered:
-        self.last_answer = msg.content
-        if self.last_answer.lower() == question.answer.lower():
-            _log.info("%s answered correct", self.author.name)
-            self.correct += 1
-        else:
-            _log.warning("%s answered wrong", self.author.name)
-        self.answered = True
+    def submit(self, member_id: int, content: str, question: RGQuestion | None):
+        """Whether the answer was correct, None when it does not count
+
+        Only the first answer to a question counts, later ones and
+        messages without a question are ignored.
+        """
+        if not question or self.has_answered(member_id):
+            return None
+        row = self.rows[member_id]
+        correct = question.matches(content)
+        if correct:
+            self.correct[row] += 1
+        self.answered[row] = self.epoch
+        return correct
 
 
 class RGGameBase:
@@ -74,29 +253,74 @@ class RGGameBase:
         settings: RedGreenGameSettings,
         limit: int,
         channel: discord.TextChannel,
+        handler: Handler | None = None,
     ) -> None:
         self.limit = limit
         self.settings = settings
+        # routes the channel's messages while the game runs
+        self.handler = handler
         self.enabled = False
         self.channel = channel
         self.is_done = False
+        self.timer: Timer | None = None
+        self.sweeper: Timer | None = None
+        self.game_id = GAME_LOG.new_game()
+        self.record(GameEvent.START, channel.id, len(settings.registered_player))
+
+    def record(self, event: GameEvent, member: int = 0, value: int = 0):
+        GAME_LOG.record(self.game_id, GameKind.REDGREEN, event, member, value)
 
-    async def start_timer(self):
-        deadline = datetime.now() + timedelta(minutes=self.limit)
-        while datetime.now() < deadline:
-            await asyncio.sleep(1)
-        await self.done()
+    def start_timer(self):
+        self.timer = SCHEDULER.call_at(
+            timedelta(minutes=self.limit).total_seconds(),
+            self.done,
+            name="red green game",
+        )
+        self.sweeper = SCHEDULER.call_at(AFK_BUCKET, self.sweep, name="rg afk sweep")
+
+    async def sweep(self):
+        """Eliminate the players of expired activity buckets, once per bucket"""
+        if self.is_done:
+            return
+        self.sweeper = SCHEDULER.call_at(AFK_BUCKET, self.sweep, name="rg afk sweep")
+        players = self.settings.registered_player
+        expired = players.expired()
+        if not expired:
+            return
+        afk = []
+        for member_id in expired:
+            member = players.member(member_id)
+            if member:
+                afk.append(member)
+            else:
+                players.remove(member_id)
+        _log.info("%i players went afk", len(afk))
+        await self.settings.eliminate_players(afk, 1)
 
     async def done(self):
+        if self.timer:
+            self.timer.cancel()
+        if self.sweeper:
+            self.sweeper.cancel()
         if self.is_done:
             return
         self.is_done = True
+        if self.handler:
+            ROUTER.unregister(self.channel.id, self.handler)
         # self.settings.allowed = False
-        remain = list(self.settings.registered_player.values())
+        players = self.settings.registered_player
         emb = discord.Embed(description="**GAME OVER !!**", color=discord.Color.red())
         await self.channel.send(embed=emb)
-        for player in remain:
-            _log.info("%i correct answer for %i", player.correct, player.author.id)
-            if player.correct < self.settings.min_correct:
-                await self.settings.eliminate_player(player.author, 2)
-        await self.channel.send(embed=emb)
+        failed, total = [], len(players)
+        for member_id in players:
+            if players.correct_of(member_id) >= self.settings.min_correct:
+                continue
+            member = players.member(member_id)
+            if member:
+                failed.append(member)
+            else:
+                # left the guild, nothing to announce
+                players.remove(member_id)
+        _log.info("%i of %i players failed", len(failed), total)
+        await self.settings.eliminate_players(failed, 2)
+        self.record(GameEvent.END, value=len(players))
@@ -1,2 +1,3 @@
 from .mail import ActiveMail
 from .ticket import Ticket
+from .transcripts import *
@@ -6,11 +6,12 @@ from typing import TYPE_CHECKING
 
 import discord
 
-from bot.logs.custom_logger import MailLogger
 from bot.utils.modmail_utils import (
     create_perms_channel,
 )
 
+from .transcripts import TRANSCRIPTS
+
 if TYPE_CHECKING:
     from bot.bot import NhCord
 
@@ -20,12 +21,9 @@ class ActiveMail:
     bot: NhCord
     sender: discord.User | discord.Member
     channel: discord.TextChannel
-    log: MailLogger | None = None
     last_seen: datetime = field(default=datetime.now())
 
     async def send_log(self, content: str, file_urls: list[str]):
-        if not self.log:
-            self.log = MailLogger(self.sender.name)
         urls = "\n".join(file_urls)
         emb = discord.Embed(
             description=f"{content}",
@@ -36,18 +34,16 @@ class ActiveMail:
         self.last_seen = datetime.now()
         if content:
             await self.channel.send(embed=emb)
-            self.log.info(content)
         if file_urls:
             emb.description = urls
             await self.channel.send(embed=emb)
-            self.log.info("Send an attachment file:\n%s", urls)
+        if content or file_urls:
+            await TRANSCRIPTS.record(self.sender.id, self.sender, content, file_urls)
 
     async def answer(self, content: str, answer_by: discord.User | discord.Member):
         if not content:
             return
-        if not self.log:
-            self.log = MailLogger(self.sender.name)
-        self.log.info("%s - %s", answer_by, content)
+        await TRANSCRIPTS.record(self.sender.id, answer_by, content)
         await self.sender.send(content)
 
     @classmethod
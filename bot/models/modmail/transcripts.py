@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List
+
+import discord
+
+from ...utils.database import BatchWriter, execute_script
+
+__all__ = ("TranscriptHit", "TranscriptStore", "TRANSCRIPTS")
+
+SCHEMA = Path("bot/data/modmail/modmail.sql")
+
+
+@dataclass
+class TranscriptHit:
+    user_id: int
+    author: str
+    sent: float
+    snippet: str
+
+
+class TranscriptStore:
+    """Modmail transcripts of every user in one full text indexed table
+
+    Messages are keyed by the id of the user the mail belongs to and
+    written behind in batches, so the number of open files does not
+    grow with the number of users who ever wrote to the bot.
+    """
+
+    def __init__(self, interval: float = 5.0) -> None:
+        self.writer = BatchWriter(interval)
+
+    async def record(
+        self,
+        user_id: int,
+        author: discord.User | discord.Member,
+        content: str,
+        attachments: Iterable[str] = (),
+    ):
+        await execute_script(SCHEMA)
+        self.writer.add(
+            "INSERT INTO mail_messages "
+            + "(user_id, author_id, author, sent, content, attachments) "
+            + "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                user_id,
+                author.id,
+                str(author),
+                time.time(),
+                content,
+                "\n".join(attachments),
+            ),
+        )
+
+    async def search(
+        self, query: str, user_id: int | None = None, limit: int = 10
+    ) -> List[TranscriptHit]:
+        """Best matches first, `query` uses the FTS5 query syntax
+
+        Raises:
+            ValueError: the query is not valid FTS5 syntax
+        """
+        conn = await execute_script(SCHEMA)
+        # what is still buffered should be found too
+        await self.writer.flush()
+        sql = (
+            "SELECT user_id, author, sent, "
+            + "snippet(mail_search, -1, '**', '**', '...', 16) AS snippet "
+            + "FROM mail_search JOIN mail_messages ON entry_id = mail_search.rowid "
+            + "WHERE mail_search MATCH ?"
+        )
+        params: tuple = (query,)
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params += (user_id,)
+        try:
+            async with conn.execute(
+                sql + " ORDER BY rank LIMIT ?", params + (limit,)
+            ) as cursor:
+                return [
+                    TranscriptHit(
+                        row["user_id"], row["author"], row["sent"], row["snippet"]
+                    )
+                    async for row in cursor
+                ]
+        except sqlite3.OperationalError as exc:
+            raise ValueError(f"Invalid search query: {exc}") from exc
+
+
+TRANSCRIPTS = TranscriptStore()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+import httpx
+
+from ..logs.custom_logger import BotLogger
+
+__all__ = ("Asset", "AssetCache")
+
+CACHE_DIR = Path("bot/cache")
+MANIFEST_PATH = CACHE_DIR / "assets.json"
+_log = BotLogger("[ASSETS]")
+
+
+@dataclass
+class Asset:
+    url: str
+    path: str
+    sha256: str = ""
+    etag: str | None = None
+    last_modified: str | None = None
+    checked_at: float = 0.0
+    fetch_time: float = 0.0
+
+
+def _digest(path: Path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class AssetCache:
+    """Keep startup assets on disk, keyed by url and validated by checksum
+
+    A cached copy whose checksum matches the manifest is used as is,
+    network is only touched once the entry is older than `max_age`
+    and then only with a conditional request.
+    """
+
+    def __init__(
+        self,
+        manifest: Path = MANIFEST_PATH,
+        max_age: float = 60 * 60 * 24 * 7,
+        timeout: float = 15.0,
+    ) -> None:
+        self.manifest = manifest
+        self.max_age = max_age
+        self.timeout = timeout
+        self.entries: Dict[str, Asset] = {}
+        self.saved = 0.0
+        if manifest.exists():
+            try:
+                with open(manifest, "r", encoding="utf-8") as file:
+                    self.entries = {
+                        url: Asset(**entry) for url, entry in json.load(file).items()
+                    }
+            except (OSError, ValueError, TypeError, AttributeError) as exc:
+                # a bad manifest only costs a refetch, it must not block startup
+                _log.warning("Ignoring unreadable manifest %s: %s", manifest, exc)
+
+    def is_valid(self, asset: Asset):
+        path = Path(asset.path)
+        return bool(asset.sha256) and path.exists() and _digest(path) == asset.sha256
+
+    async def ensure(self, assets: Iterable[Tuple[str, str]]):
+        """Make sure every (url, path) pair is available locally
+
+        Args:
+            assets (Iterable[Tuple[str, str]]): url and target file path
+
+        Returns:
+            float: estimated seconds saved by not fetching
+        """
+        start = time.perf_counter()
+        async with httpx.AsyncClient(
+            timeout=self.timeout, follow_redirects=True
+        ) as client:
+            results = await asyncio.gather(
+                *(self._ensure_one(client, url, path) for url, path in assets),
+                return_exceptions=True,
+            )
+        # what did download is kept even when another asset failed
+        self._save()
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        _log.info(
+            "Assets ready in %.2fs, saved about %.2fs",
+            time.perf_counter() - start,
+            self.saved,
+        )
+        return self.saved
+
+    async def _ensure_one(self, client: httpx.AsyncClient, url: str, path: str):
+        asset = self.entries.get(url)
+        if not asset or asset.path != path:
+            asset = Asset(url, path)
+        valid = self.is_valid(asset)
+        if valid and time.time() - asset.checked_at < self.max_age:
+            self.saved += asset.fetch_time
+            self.entries[url] = asset
+            return
+        headers = {}
+        if valid and asset.etag:
+            headers["If-None-Match"] = asset.etag
+        if valid and asset.last_modified:
+            headers["If-Modified-Since"] = asset.last_modified
+        start = time.perf_counter()
+        try:
+            resp = await client.get(url, headers=headers)
+            if resp.status_code != 304:
+                resp.raise_for_status()
+        except httpx.HTTPError as exc:
+            if not valid:
+                raise
+            _log.warning("Failed to revalidate %s, using cached copy: %s", url, exc)
+            self.saved += asset.fetch_time
+            self.entries[url] = asset
+            return
+        elapsed = time.perf_counter() - start
+        asset.checked_at = time.time()
+        if resp.status_code == 304:
+            _log.info("%s not modified", path)
+            self.saved += max(asset.fetch_time - elapsed, 0.0)
+            self.entries[url] = asset
+            return
+        content = resp.content
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
+        asset.sha256 = hashlib.sha256(content).hexdigest()
+        asset.etag = resp.headers.get("ETag")
+        asset.last_modified = resp.headers.get("Last-Modified")
+        asset.fetch_time = elapsed
+        self.entries[url] = asset
+        _log.info("Fetched %s in %.2fs", path, elapsed)
+
+    def _save(self):
+        self.manifest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump({url: asdict(asset) for url, asset in self.entries.items()}, file)
+        os.replace(tmp, self.manifest)
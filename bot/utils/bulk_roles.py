@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Coroutine, Dict, Iterable, List, Set
+
+import discord
+from discord import Member, Message, Role, User
+
+from ..logs.custom_logger import BotLogger
+from .database import BatchWriter, execute_script
+from .edits import EDITS
+from .role_index import ROLE_INDEX
+
+__all__ = ("RoleJob", "AdaptiveLimit", "BulkRoleEngine", "ROLES")
+
+SCHEMA = Path("bot/data/roles/roles.sql")
+# progress message edits are coalesced to one per window
+PROGRESS_WINDOW = 2.0
+_log = BotLogger("[BULK ROLES]")
+
+
+@dataclass
+class RoleJob:
+    job_id: str
+    role: Role
+    members: List[int]
+    total: int
+    remove: bool = False
+    reason: str | None = None
+    done: int = 0
+    skipped: int = 0
+    failed: int = 0
+    aborted: str | None = None
+    finished: bool = False
+    # small game jobs skip the journal, a restart just drops them
+    journaled: bool = True
+
+    @property
+    def processed(self):
+        return self.done + self.skipped + self.failed
+
+    def render(self):
+        state = (self.done, self.skipped, self.failed, self.aborted, self.finished)
+        action = "Removing" if self.remove else "Assigning"
+        if self.finished:
+            action = "Removed" if self.remove else "Assigned"
+        content = (
+            f"{action} {self.role.mention}: {self.processed}/{self.total} members "
+            + f"(changed {self.done}, skipped {self.skipped}, failed {self.failed})"
+        )
+        if self.aborted:
+            content += f"\nStopped: {self.aborted}"
+        return state, {"content": content}
+
+
+class AdaptiveLimit:
+    """Concurrency limit that follows how fast the route answers
+
+    Grows by one after a full window of fast requests and halves when a
+    request was slow, which is what a request held back by an exhausted
+    rate limit bucket looks like from here.
+    """
+
+    def __init__(self, start: int, maximum: int, slow: float) -> None:
+        self.limit = start
+        self.maximum = maximum
+        self.slow = slow
+        self.active = 0
+        self._streak = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self, elapsed: float):
+        async with self._cond:
+            self.active -= 1
+            if elapsed > self.slow:
+                self.limit = max(1, self.limit // 2)
+                self._streak = 0
+            else:
+                self._streak += 1
+                if self._streak >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self._streak = 0
+            self._cond.notify_all()
+
+
+class BulkRoleEngine:
+    """Add or remove one role on many members
+
+    Members that are already in the wanted state are skipped up front
+    through the role index and again right before their request. Work
+    runs under an adaptive limit per guild, progress goes to a single
+    coalesced message and every handled member is journaled to sqlite,
+    so a run interrupted by a restart resumes with what is left.
+    """
+
+    def __init__(
+        self,
+        start: int = 2,
+        maximum: int = 8,
+        slow: float = 1.0,
+        interval: float = 2.0,
+    ) -> None:
+        self.start = start
+        self.maximum = maximum
+        self.slow = slow
+        self.writer = BatchWriter(interval)
+        self.limits: Dict[int, AdaptiveLimit] = {}
+        self.jobs: Dict[str, RoleJob] = {}
+        self.resumed = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def plan(self, role: Role, members: Iterable[Member | User | int], remove: bool):
+        requested = {
+            member if isinstance(member, int) else member.id for member in members
+        }
+        holders = ROLE_INDEX.of(role.guild).holders(role.id)
+        targets = requested & holders if remove else requested - holders
+        return RoleJob(
+            secrets.token_hex(4),
+            role,
+            sorted(targets),
+            len(requested),
+            remove,
+            skipped=len(requested) - len(targets),
+        )
+
+    async def run(
+        self,
+        role: Role,
+        members: Iterable[Member | User | int],
+        *,
+        remove: bool = False,
+        reason: str | None = None,
+        progress: Message | None = None,
+        journal: bool = True,
+    ):
+        job = self.plan(role, members, remove)
+        job.reason = reason
+        job.journaled = journal and bool(job.members)
+        if job.journaled:
+            await self._journal(job)
+        return await self._execute(job, progress)
+
+    def submit(
+        self,
+        role: Role,
+        members: Iterable[Member | User | int],
+        *,
+        remove: bool = False,
+        reason: str | None = None,
+        journal: bool = False,
+    ):
+        """Run in the background, for game events that should not wait on it
+
+        Single eliminations skip the journal by default, they should not
+        wait on a database flush before their one request goes out.
+        """
+        return self._spawn(
+            self.run(role, members, remove=remove, reason=reason, journal=journal)
+        )
+
+    def _spawn(self, coro: Coroutine):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            _log.error("Role job failed", exc_info=task.exception())
+
+    async def _journal(self, job: RoleJob):
+        await execute_script(SCHEMA)
+        self.writer.add(
+            "INSERT INTO role_jobs VALUES (?, ?, ?, ?, ?)",
+            (job.job_id, job.role.guild.id, job.role.id, int(job.remove), job.reason),
+        )
+        self.writer.extend(
+            "INSERT OR IGNORE INTO role_job_members (job_id, member_id) VALUES (?, ?)",
+            ((job.job_id, member_id) for member_id in job.members),
+        )
+        await self.writer.flush()
+
+    def _forget(self, job_id: str):
+        for table in ("role_jobs", "role_job_members"):
+            self.writer.add(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+
+    async def _execute(self, job: RoleJob, progress: Message | None):
+        self.jobs[job.job_id] = job
+        guild_id = job.role.guild.id
+        limit = self.limits.get(guild_id)
+        if limit is None:
+            limit = self.limits[guild_id] = AdaptiveLimit(
+                self.start, self.maximum, self.slow
+            )
+        # one iterator shared by the workers hands out every member once
+        pending = iter(job.members)
+
+        async def worker():
+            for member_id in pending:
+                if job.aborted:
+                    return
+                await limit.acquire()
+                started = time.monotonic()
+                try:
+                    await self._apply(job, member_id)
+                finally:
+                    await limit.release(time.monotonic() - started)
+                if progress:
+                    EDITS.mark_dirty(progress, job.render, PROGRESS_WINDOW)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(limit.maximum)))
+        finally:
+            del self.jobs[job.job_id]
+        job.finished = True
+        # failed members stay journaled and are retried on the next resume
+        if job.journaled and (job.aborted or not job.failed):
+            self._forget(job.job_id)
+        if progress:
+            EDITS.mark_dirty(progress, job.render, 0)
+            await EDITS.flush(progress)
+            EDITS.forget(progress)
+        _log.info(
+            "Job %s on %s: %i changed, %i skipped, %i failed",
+            job.job_id,
+            job.role,
+            job.done,
+            job.skipped,
+            job.failed,
+        )
+        return job
+
+    async def _apply(self, job: RoleJob, member_id: int):
+        member = job.role.guild.get_member(member_id)
+        if member is None or (member.get_role(job.role.id) is not None) != job.remove:
+            job.skipped += 1
+        else:
+            try:
+                if job.remove:
+                    await member.remove_roles(job.role, reason=job.reason)
+                else:
+                    await member.add_roles(job.role, reason=job.reason)
+            except discord.NotFound:
+                job.skipped += 1
+            except discord.Forbidden:
+                job.aborted = f"Missing permission to manage {job.role}"
+                return
+            except discord.HTTPException:
+                _log.exception("Role change failed for %i", member_id)
+                job.failed += 1
+                return
+            else:
+                job.done += 1
+        if not job.journaled:
+            return
+        self.writer.add(
+            "UPDATE role_job_members SET done = 1 WHERE job_id = ? AND member_id = ?",
+            (job.job_id, member_id),
+        )
+
+    async def resume(self, bot: discord.Client):
+        """Continue the jobs a previous run left unfinished"""
+        if self.resumed:
+            return
+        self.resumed = True
+        conn = await execute_script(SCHEMA)
+        async with conn.execute("SELECT * FROM role_jobs") as cursor:
+            rows = await cursor.fetchall()
+        for row in rows:
+            guild = bot.get_guild(row["guild_id"])
+            role = guild.get_role(row["role_id"]) if guild else None
+            if not role:
+                _log.warning("Dropping job %s, role not found", row["job_id"])
+                self._forget(row["job_id"])
+                continue
+            async with conn.execute(
+                "SELECT member_id FROM role_job_members WHERE job_id = ? AND done = 0",
+                (row["job_id"],),
+            ) as cursor:
+                members = [member["member_id"] async for member in cursor]
+            job = RoleJob(
+                row["job_id"],
+                role,
+                members,
+                len(members),
+                bool(row["remove"]),
+                row["reason"],
+            )
+            _log.info("Resuming job %s with %i members left", job.job_id, job.total)
+            self._spawn(self._execute(job, None))
+
+
+ROLES = BulkRoleEngine()
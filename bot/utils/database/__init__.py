@@ -0,0 +1,2 @@
+from .batch import *
+from .connection import *
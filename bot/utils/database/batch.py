@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, ClassVar, Iterable, List, Sequence, Tuple
+from weakref import WeakSet
+
+import aiosqlite
+
+from ...logs.custom_logger import BotLogger
+from ..scheduler import SCHEDULER, Timer
+from .connection import ensure_connection
+
+__all__ = ("BatchWriter",)
+
+_log = BotLogger("[DATABASE]")
+
+
+class BatchWriter:
+    """Write-behind buffer flushed in one transaction per interval
+
+    Statements keep their order, consecutive rows for the same
+    statement are sent with a single executemany. A flush is only
+    scheduled while something is buffered. A batch that keeps failing
+    is written row by row after `retries` attempts and the rows that
+    still fail are logged and dropped, so one bad row cannot hold
+    back every later write.
+    """
+
+    instances: ClassVar[WeakSet[BatchWriter]] = WeakSet()
+    # writers share one connection, transactions must not interleave
+    _lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+
+    def __init__(self, interval: float = 5.0, retries: int = 3) -> None:
+        self.instances.add(self)
+        self.interval = interval
+        self.retries = retries
+        self.failures = 0
+        self.dropped = 0
+        self._batches: List[Tuple[str, List[Sequence[Any]]]] = []
+        self._timer: Timer | None = None
+        self.rows = 0
+        self.flushes = 0
+
+    def add(self, sql: str, params: Sequence[Any] = ()):
+        self.extend(sql, (params,))
+
+    def extend(self, sql: str, rows: Iterable[Sequence[Any]]):
+        if self._batches and self._batches[-1][0] == sql:
+            self._batches[-1][1].extend(rows)
+        else:
+            self._batches.append((sql, list(rows)))
+        self._schedule()
+
+    def _schedule(self):
+        if not self._timer or not self._timer.active:
+            self._timer = SCHEDULER.call_at(
+                self.interval, self.flush, name="batch flush"
+            )
+
+    @classmethod
+    async def flush_all(cls):
+        for writer in list(cls.instances):
+            await writer.flush()
+
+    async def flush(self):
+        if self._timer:
+            self._timer.cancel()
+        if not self._batches:
+            return
+        batches, self._batches = self._batches, []
+        conn = await ensure_connection()
+        async with self._lock:
+            try:
+                for sql, rows in batches:
+                    await conn.executemany(sql, rows)
+                await conn.commit()
+            except Exception:  # pylint: disable=broad-exception-caught
+                _log.exception("Failed to flush %i statements", len(batches))
+                await conn.rollback()
+                self.failures += 1
+                if self.failures < self.retries:
+                    # keep the rows for the next flush
+                    self._batches = batches + self._batches
+                    self._schedule()
+                    return
+                await self._flush_rows(conn, batches)
+        self.failures = 0
+        self.flushes += 1
+        self.rows += sum(len(rows) for _, rows in batches)
+
+    async def _flush_rows(
+        self, conn: aiosqlite.Connection, batches: List[Tuple[str, List[Sequence[Any]]]]
+    ):
+        """One statement per row, a failing statement only undoes itself"""
+        dropped = self.dropped
+        for sql, rows in batches:
+            for row in rows:
+                try:
+                    await conn.execute(sql, row)
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    self.dropped += 1
+                    _log.error("Dropped row %r of %s: %s", row, sql, exc)
+        await conn.commit()
+        _log.warning("Flushed row by row, %i rows dropped", self.dropped - dropped)
@@ -1,2 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import aiosqlite
+
+__all__ = ("ensure_connection", "execute_script", "close_connection")
+
+DATABASE_PATH = Path("bot/data/nhcord.db")
+_connection: aiosqlite.Connection | None = None  # pylint: disable=invalid-name
+_lock = asyncio.Lock()
+_scripts: set[Path] = set()
+
+
 async def ensure_connection():
-    ...
+    """Open the shared database connection on first use
+
+    Returns:
+        aiosqlite.Connection: connection shared by every store
+    """
+    global _connection  # pylint: disable=global-statement
+    async with _lock:
+        if _connection is None:
+            _connection = await aiosqlite.connect(DATABASE_PATH)
+            _connection.row_factory = aiosqlite.Row
+            await _connection.execute("PRAGMA journal_mode=WAL")
+            await _connection.execute("PRAGMA synchronous=NORMAL")
+    return _connection
+
+
+async def execute_script(path: Path):
+    """Run a schema file once per process"""
+    conn = await ensure_connection()
+    if path in _scripts:
+        return conn
+    with open(path, "r", encoding="utf-8") as script:
+        await conn.executescript(script.read())
+    _scripts.add(path)
+    return conn
+
+
+async def close_connection():
+    global _connection  # pylint: disable=global-statement
+    if _connection is not None:
+        await _connection.close()
+        _connection = None
+        _scripts.clear()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from discord import Message
+
+from ..logs.custom_logger import BotLogger
+from .scheduler import SCHEDULER, DeadlineScheduler, Timer
+
+__all__ = ("EditCoalescer", "EDITS")
+
+_log = BotLogger("[EDITS]")
+Render = Callable[[], Tuple[Hashable, Dict[str, Any]]]
+
+
+@dataclass
+class _Pending:
+    message: Message
+    render: Render
+    last_state: Hashable = None
+    last_edit: float = 0.0
+    timer: Timer | None = None
+
+
+class EditCoalescer:
+    """Coalesce message edits of live counters
+
+    Views mark a message dirty with a render callback returning
+    `(state, edit_kwargs)`. At most one edit per message goes out per
+    `window` seconds, rendered when it is sent, and it is skipped if
+    the state equals the last one sent.
+    """
+
+    def __init__(
+        self, window: float = 10.0, scheduler: DeadlineScheduler = SCHEDULER
+    ) -> None:
+        self.window = window
+        self.scheduler = scheduler
+        self._messages: Dict[int, _Pending] = {}
+        self.marks = 0
+        self.sent = 0
+        self.unchanged = 0
+
+    @property
+    def saved(self):
+        """Dirty marks that did not cost an edit"""
+        return self.marks - self.sent
+
+    def stats(self):
+        return {
+            "tracked": len(self._messages),
+            "marks": self.marks,
+            "sent": self.sent,
+            "saved": self.saved,
+            "unchanged": self.unchanged,
+        }
+
+    def mark_dirty(
+        self, message: Message, render: Render, window: float | None = None
+    ):
+        self.marks += 1
+        pending = self._messages.get(message.id)
+        if pending is None:
+            pending = self._messages[message.id] = _Pending(message, render)
+        pending.message = message
+        pending.render = render
+        if pending.timer and pending.timer.active:
+            return
+        window = self.window if window is None else window
+        delay = max(pending.last_edit + window - time.monotonic(), 0.0)
+        pending.timer = self.scheduler.call_at(
+            delay, lambda: self._flush(message.id), name="coalesced edit"
+        )
+
+    async def flush(self, message: Message):
+        """Send a pending edit right away, e.g. before a message is replaced"""
+        pending = self._messages.get(message.id)
+        if pending and pending.timer and pending.timer.active:
+            pending.timer.cancel()
+            await self._flush(message.id)
+
+    def forget(self, message: Message):
+        pending = self._messages.pop(message.id, None)
+        if pending and pending.timer:
+            pending.timer.cancel()
+
+    async def _flush(self, message_id: int):
+        pending = self._messages.get(message_id)
+        if pending is None:
+            return
+        state, kwargs = pending.render()
+        if state == pending.last_state:
+            self.unchanged += 1
+            return
+        pending.last_state = state
+        pending.last_edit = time.monotonic()
+        self.sent += 1
+        try:
+            await pending.message.edit(**kwargs)
+        except Exception:  # pylint: disable=broad-exception-caught
+            _log.exception("Coalesced edit failed for %i", message_id)
+
+
+EDITS = EditCoalescer()
@@ -1 +1,3 @@
+from .board import *
+from .grouping import *
 from .minigames_utils import *
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from io import BytesIO
+from typing import Dict, Iterable, Literal, Tuple
+
+from discord import File
+
+from ...config import CONFIG
+from .minigames_utils import create_image_grid
+
+__all__ = ("BoardRenderer", "RENDERER")
+
+BoardFormat = Literal["png", "jpeg", "webp"]
+EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+WARM_PANELS = 6
+
+
+def encode_board(
+    panels: int, mask: int, safepos: int, fmt: BoardFormat, quality: int
+) -> bytes:
+    """Compose and encode a single board, runs inside the executor"""
+    revealed = [idx for idx in range(panels) if mask >> idx & 1]
+    img = create_image_grid(revealed, safepos, panels)
+    with BytesIO() as buffer:
+        if fmt == "png":
+            # png is lossless, quality picks the zlib level instead
+            img.save(buffer, "PNG", compress_level=min(quality // 11, 9))
+        else:
+            img.save(buffer, fmt.upper(), quality=quality)
+        return buffer.getvalue()
+
+
+class BoardRenderer:
+    """Render bridge boards in a bounded executor and cache the encoded bytes
+
+    A board only depends on the panel count, which panels are revealed
+    and, when the safe panel is among them, where it is. That is 47
+    variants for 4 panels, each encoded once and kept as immutable bytes.
+    Wider bridges have too many variants to keep, so the least recently
+    used boards are dropped past `max_boards`.
+    """
+
+    def __init__(
+        self,
+        fmt: BoardFormat = "png",
+        quality: int = 80,
+        workers: int = 2,
+        processes: bool = False,
+        max_boards: int = 4096,
+    ) -> None:
+        if fmt not in EXTENSIONS:
+            raise ValueError(f"Unsupported board format {fmt}")
+        self.max_boards = max_boards
+        self.fmt: BoardFormat = fmt
+        self.quality = quality
+        self.filename = f"bridgechoose.{EXTENSIONS[fmt]}"
+        self.executor: Executor = (
+            ProcessPoolExecutor(workers) if processes else ThreadPoolExecutor(workers)
+        )
+        self._boards: OrderedDict[Tuple[int, int, int], bytes] = OrderedDict()
+        self._pending: Dict[Tuple[int, int, int], asyncio.Future[bytes]] = {}
+
+    def key(self, revealed: Iterable[int], safepos: int, panels: int):
+        mask = 0
+        for idx in revealed:
+            mask |= 1 << idx
+        return panels, mask, safepos if mask >> safepos & 1 else -1
+
+    async def render(self, revealed: Iterable[int], safepos: int, panels: int = 4):
+        key = self.key(revealed, safepos, panels)
+        board = self._boards.get(key)
+        if board is not None:
+            self._boards.move_to_end(key)
+            return board
+        pending = self._pending.get(key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            # unpacked by name, mypy cannot match *key followed by more arguments
+            _, mask, safe = key
+            pending = self._pending[key] = asyncio.ensure_future(
+                loop.run_in_executor(
+                    self.executor,
+                    encode_board,
+                    panels,
+                    mask,
+                    safe,
+                    self.fmt,
+                    self.quality,
+                )
+            )
+        try:
+            board = await asyncio.shield(pending)
+        finally:
+            self._pending.pop(key, None)
+        self._boards[key] = board
+        if len(self._boards) > self.max_boards:
+            self._boards.popitem(last=False)
+        return board
+
+    async def file(self, revealed: Iterable[int], safepos: int, panels: int = 4):
+        return File(
+            BytesIO(await self.render(revealed, safepos, panels)), self.filename
+        )
+
+    async def warm(self, panels: int = 4):
+        """Render every variant upfront, only done for narrow bridges"""
+        if panels > WARM_PANELS:
+            return
+        await asyncio.gather(
+            *(
+                self.render(
+                    [idx for idx in range(panels) if mask >> idx & 1],
+                    safepos,
+                    panels,
+                )
+                for safepos in range(panels)
+                for mask in range(1 << panels)
+            )
+        )
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+RENDERER = BoardRenderer(**CONFIG.get("board", {}))
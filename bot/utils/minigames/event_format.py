@@ -0,0 +1,130 @@
+"""On-disk format of the minigame event log and its reader
+
+Every event is one fixed 32 byte record, so reading is a strided walk
+over a memory map. Only the standard library is used here, the
+`scripts/game_events.py` reader loads this file without the bot.
+"""
+from __future__ import annotations
+
+import enum
+import mmap
+import struct
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, NamedTuple
+
+__all__ = ("GameKind", "GameEvent", "Record", "EventReader", "open_append")
+
+EVENT_LOG = Path("bot/data/games.evlog")
+# time, game id, game kind, event, member id, value
+RECORD = struct.Struct("<dQBB2xQi")
+# the header takes one record slot, records stay aligned to their size
+HEADER = struct.Struct("<4sHH24x")
+MAGIC = b"NHEV"
+VERSION = 1
+
+
+class GameKind(enum.IntEnum):
+    BRIDGE = 1
+    REDGREEN = 2
+
+
+class GameEvent(enum.IntEnum):
+    """What happened, `member` and `value` of a record depend on it"""
+
+    START = 1  # member: channel id, value: players
+    END = 2  # value: players left
+    CLICK = 3  # member: turn, value: panel, negative when it broke
+    SWITCH = 4  # member: who switched
+    TURN = 5  # member: the new turn
+    SEGMENT = 6  # value: segment reached
+    ANSWER = 7  # value: 1 correct, 0 wrong
+    SIGNAL = 8  # value: 1 green, 0 red
+    QUESTION = 9  # value: questions left in the deck
+    ELIMINATE = 10  # value: elimination reason
+
+
+# events whose member is a player, signals and questions record the moderator
+PLAYER_EVENTS = frozenset(
+    (GameEvent.CLICK, GameEvent.ANSWER, GameEvent.ELIMINATE, GameEvent.TURN)
+)
+
+
+class Record(NamedTuple):
+    time: float
+    game: int
+    kind: GameKind
+    event: GameEvent
+    member: int
+    value: int
+
+    def __str__(self) -> str:
+        stamp = datetime.fromtimestamp(self.time).isoformat(" ", "milliseconds")
+        return f"{stamp} {self.event.name:<9} member={self.member} value={self.value}"
+
+
+def open_append(path: Path) -> BinaryIO:
+    """The log opened for appending, with a header when it is new"""
+    file = open(path, "ab")  # pylint: disable=consider-using-with
+    end = file.tell()
+    if end % RECORD.size:
+        # a torn record from a crash, drop it instead of reading it as an event
+        end -= end % RECORD.size
+        file.truncate(end)
+        file.seek(end)
+    if end == 0:
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+    return file
+
+
+class EventReader:
+    """Records of an event log read through a memory map"""
+
+    def __init__(self, path: Path = EVENT_LOG) -> None:
+        self.path = path
+
+    def __iter__(self) -> Iterator[Record]:
+        with open(self.path, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as view:
+            magic, version, size = HEADER.unpack_from(view)
+            if magic != MAGIC or version != VERSION or size != RECORD.size:
+                raise ValueError(f"{self.path} is not a version {VERSION} event log")
+            end = len(view) - len(view) % RECORD.size
+            for offset in range(HEADER.size, end, RECORD.size):
+                stamp, game, kind, event, member, value = RECORD.unpack_from(
+                    view, offset
+                )
+                if event:
+                    yield Record(
+                        stamp, game, GameKind(kind), GameEvent(event), member, value
+                    )
+
+    def game(self, game: int):
+        return [record for record in self if record.game == game]
+
+    def games(self):
+        """Start record of every game, in the order they started"""
+        return [record for record in self if record.event is GameEvent.START]
+
+    def stats(self, kind: GameKind | None = None):
+        events: Dict[GameEvent, int] = Counter()
+        games, players = set(), set()
+        correct = 0
+        for record in self:
+            if kind and record.kind is not kind:
+                continue
+            events[record.event] += 1
+            games.add(record.game)
+            if record.event is GameEvent.ANSWER:
+                correct += record.value
+            if record.event in PLAYER_EVENTS:
+                players.add(record.member)
+        answers = events[GameEvent.ANSWER]
+        return {
+            "games": len(games),
+            "players": len(players),
+            "events": {event.name: count for event, count in sorted(events.items())},
+            "correct share": round(correct / answers, 3) if answers else None,
+        }
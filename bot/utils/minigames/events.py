@@ -0,0 +1,87 @@
+"""Append-only binary log of minigame events
+
+Writing is a struct pack into a buffer, the record format and the
+reader live in `event_format`. Read it from the repository root:
+    python scripts/game_events.py games
+    python scripts/game_events.py replay <game id>
+    python scripts/game_events.py stats [--game bridge|redgreen]
+"""
+from __future__ import annotations
+
+import secrets
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+
+from ...logs.custom_logger import BotLogger
+from ..scheduler import SCHEDULER, Timer
+from .event_format import (EVENT_LOG, RECORD, EventReader, GameEvent, GameKind,
+                           Record, open_append)
+
+__all__ = ("GameKind", "GameEvent", "Record", "GameEventLog", "EventReader", "GAME_LOG")
+
+_log = BotLogger("[GAME EVENTS]")
+
+
+class GameEventLog:
+    """Buffered appender, flushed when the buffer fills or after `interval`"""
+
+    def __init__(
+        self, path: Path = EVENT_LOG, limit: int = 64 * 1024, interval: float = 5.0
+    ) -> None:
+        self.path = path
+        self.limit = limit
+        self.interval = interval
+        self.records = 0
+        self._buffer = bytearray()
+        self._file: BinaryIO | None = None
+        self._timer: Timer | None = None
+
+    @staticmethod
+    def new_game():
+        return secrets.randbits(63)
+
+    def record(
+        self,
+        game: int,
+        kind: GameKind,
+        event: GameEvent,
+        member: int = 0,
+        value: int = 0,
+    ):
+        self._buffer += RECORD.pack(
+            datetime.now().timestamp(), game, kind, event, member, value
+        )
+        self.records += 1
+        if len(self._buffer) >= self.limit:
+            self.flush()
+        elif not self._timer or not self._timer.active:
+            self._timer = SCHEDULER.call_at(
+                self.interval, self.flush, name="game event flush"
+            )
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return open_append(self.path)
+
+    def flush(self):
+        if self._timer:
+            self._timer.cancel()
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._file = self._open()
+            _log.info("Appending game events to %s", self.path)
+        # appends land in the page cache, this does not wait on the disk
+        self._file.write(self._buffer)
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+GAME_LOG = GameEventLog()
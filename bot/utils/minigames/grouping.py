@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import csv
+import io
+import random
+from typing import Iterable, Iterator, List, Literal, Sequence, Tuple
+
+import discord
+from discord import Guild
+
+__all__ = ("shuffled", "split_groups", "split_pairs", "groups_file", "pairs_file")
+
+Format = Literal["text", "csv"]
+
+
+def shuffled(member_ids: Iterable[int], seed: int) -> List[int]:
+    """Member ids in an order that only depends on the ids and the seed
+
+    The shuffle is Fisher-Yates, O(n). The ids are sorted first: they
+    come from sets whose iteration order depends on their insertion
+    history, so without it the same seed would not repeat a draw after
+    a restart. The sort runs in C and costs about as much as the shuffle.
+    """
+    order = sorted(member_ids)
+    random.Random(seed).shuffle(order)
+    return order
+
+
+def split_groups(
+    order: Sequence[int], count: int
+) -> Iterator[Tuple[int, Sequence[int]]]:
+    """Deal members round robin into `count` groups, sizes differ by one at most"""
+    for group in range(min(count, len(order))):
+        yield group + 1, order[group::count]
+
+
+def split_pairs(order: Sequence[int]) -> Iterator[Tuple[int, int, int]]:
+    """Consecutive members as pairs, an odd one out is left to the caller"""
+    for index in range(len(order) // 2):
+        yield index + 1, order[2 * index], order[2 * index + 1]
+
+
+def _name(guild: Guild, member_id: int):
+    member = guild.get_member(member_id)
+    return str(member) if member else str(member_id)
+
+
+class _Attachment:
+    """Text written straight into an in memory buffer sent as a file"""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.buffer = io.BytesIO()
+        self.text = io.TextIOWrapper(self.buffer, encoding="utf-8", newline="")
+
+    def file(self):
+        self.text.flush()
+        self.text.detach()
+        self.buffer.seek(0)
+        return discord.File(self.buffer, filename=self.filename)
+
+
+def groups_file(
+    guild: Guild, order: Sequence[int], count: int, fmt: Format = "text"
+) -> discord.File:
+    out = _Attachment(f"groups.{'csv' if fmt == 'csv' else 'txt'}")
+    if fmt == "csv":
+        writer = csv.writer(out.text)
+        writer.writerow(("group", "member_id", "name"))
+        for group, members in split_groups(order, count):
+            writer.writerows(
+                (group, member_id, _name(guild, member_id)) for member_id in members
+            )
+        return out.file()
+    for group, members in split_groups(order, count):
+        out.text.write(f"Group {group} ({len(members)} members)\n")
+        out.text.writelines(
+            f"  {_name(guild, member_id)} ({member_id})\n" for member_id in members
+        )
+    return out.file()
+
+
+def pairs_file(
+    guild: Guild, order: Sequence[int], fmt: Format = "text"
+) -> discord.File:
+    out = _Attachment(f"pairs.{'csv' if fmt == 'csv' else 'txt'}")
+    left = order[-1] if len(order) % 2 else None
+    if fmt == "csv":
+        writer = csv.writer(out.text)
+        writer.writerow(("pair", "first_id", "first", "second_id", "second"))
+        writer.writerows(
+            (pair, one, _name(guild, one), two, _name(guild, two))
+            for pair, one, two in split_pairs(order)
+        )
+        if left is not None:
+            writer.writerow(("unpaired", left, _name(guild, left), "", ""))
+        return out.file()
+    out.text.writelines(
+        f"{pair}. {_name(guild, one)} vs {_name(guild, two)}\n"
+        for pair, one, two in split_pairs(order)
+    )
+    if left is not None:
+        out.text.write(f"{_name(guild, left)} left unpaired\n")
+    return out.file()
@@ -1,30 +1,51 @@
+from math import ceil, sqrt
+
+import numpy as np
 from discord import Guild, Role
 from PIL import Image
 
+from ..role_index import ROLE_INDEX
+from .tiles import TileRegistry
+
 TIMELEFT = "Timeleft: <t:{time}:R>\n"
 WIDTH, HEIGHT = (160, 120)
-black = Image.new("RGB", (WIDTH, HEIGHT))
-broken = Image.open("bot/glass_broken.jpg").resize((WIDTH, HEIGHT))
-safe = Image.open("bot/glass_safe.jpg").resize((WIDTH, HEIGHT))
-
-
-def create_image_grid(revealed: list[int], safepos: int):
-    rows = 2
-    cols = 2
-    grid = Image.new("RGB", size=(cols * WIDTH, rows * HEIGHT))
-    for idx in range(4):
-        if idx in revealed:
-            grid.paste(
-                broken if idx != safepos else safe,
-                box=(idx % cols * WIDTH, idx // cols * HEIGHT),
-            )
-            continue
-        grid.paste(black, box=(idx % cols * WIDTH, idx // cols * HEIGHT))
-    return grid
+# the whole board keeps the 2x2 size, tiles shrink as panels grow
+BOARD_WIDTH, BOARD_HEIGHT = (2 * WIDTH, 2 * HEIGHT)
+MAX_PANELS = 24
+TILES = TileRegistry()
+TILES.register("broken", "bot/glass_broken.jpg")
+TILES.register("safe", "bot/glass_safe.jpg")
+TILES.register_solid("black", (0, 0, 0))
+# discord's dark background, for grid cells past the last panel
+TILES.register_solid("empty", (49, 51, 56))
+# atlas order, a panel state is an index into it
+HIDDEN, BROKEN, SAFE, EMPTY = range(4)
+ATLAS = ("black", "broken", "safe", "empty")
+
+
+def grid_shape(panels: int):
+    """Rows and columns used by both the board image and the panel buttons"""
+    cols = ceil(sqrt(panels))
+    return ceil(panels / cols), cols
+
+
+def create_image_grid(revealed: list[int], safepos: int, panels: int = 4):
+    rows, cols = grid_shape(panels)
+    width, height = BOARD_WIDTH // cols, BOARD_HEIGHT // rows
+    atlas = TILES.atlas(ATLAS, (width, height))
+    states = np.full(rows * cols, HIDDEN, dtype=np.intp)
+    # non square boards leave the end of the last row without a button
+    states[panels:] = EMPTY
+    states[revealed] = BROKEN
+    if safepos in revealed:
+        states[safepos] = SAFE
+    # (rows, cols, h, w, 3) -> (rows, h, cols, w, 3) -> (rows * h, cols * w, 3)
+    board = atlas[states.reshape(rows, cols)].transpose(0, 2, 1, 3, 4)
+    return Image.fromarray(board.reshape(rows * height, cols * width, 3))
 
 
 async def get_member_by_role(guild: Guild, role: Role, role_except: Role | None):
-    """Fetch all members then check they have one of required roles and exception role
+    """Members that have the required role and not the exception role, bots excluded
 
     Args:
         guild (Guild): guild members to check
@@ -34,10 +55,8 @@ async def get_member_by_role(guild: Guild, role: Role, role_except: Role | None)
     Yields:
         discord.Member: founded member
     """
-    for member in guild.members:
-        if (
-            member.get_role(role.id)
-            and (not member.get_role(role_except.id) if role_except else True)
-            and not member.bot
-        ):
-            yield member
+    found = ROLE_INDEX.query(
+        guild, role.id, (role_except.id,) if role_except else (), bots=False
+    )
+    for member in ROLE_INDEX.resolve(guild, found):
+        yield member
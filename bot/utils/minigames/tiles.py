@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ...logs.custom_logger import BotLogger
+
+__all__ = ("TileRegistry",)
+
+TILE_CACHE = Path("bot/cache/tiles")
+_log = BotLogger("[TILES]")
+
+
+class TileRegistry:
+    """Lazily decoded, pre-resized image tiles
+
+    Nothing is decoded until a tile is requested, resized tiles are
+    kept in memory and in `cache_dir` keyed by source hash and size,
+    so a restart only decodes the small cached png.
+    """
+
+    def __init__(self, cache_dir: Path = TILE_CACHE) -> None:
+        self.cache_dir = cache_dir
+        self.sources: Dict[str, str] = {}
+        self.solids: Dict[str, Tuple[int, int, int]] = {}
+        self._hashes: Dict[str, str] = {}
+        self._tiles: Dict[Tuple[str, int, int], Image.Image] = {}
+        self._atlases: Dict[Tuple[Tuple[str, ...], int, int], np.ndarray] = {}
+        # boards are rendered from executor threads
+        self._lock = threading.Lock()
+
+    def register(self, name: str, path: str):
+        self.sources[name] = path
+        self._forget(name)
+
+    def register_solid(self, name: str, color: Tuple[int, int, int]):
+        self.solids[name] = color
+        self._forget(name)
+
+    def _forget(self, name: str):
+        self._hashes.pop(name, None)
+        for key in [key for key in self._tiles if key[0] == name]:
+            del self._tiles[key]
+        for atlas in [atlas for atlas in self._atlases if name in atlas[0]]:
+            del self._atlases[atlas]
+
+    def source_hash(self, name: str):
+        if name not in self._hashes:
+            with open(self.sources[name], "rb") as file:
+                self._hashes[name] = hashlib.sha256(file.read()).hexdigest()[:16]
+        return self._hashes[name]
+
+    def get(self, name: str, size: Tuple[int, int]) -> Image.Image:
+        width, height = size
+        key = (name, width, height)
+        tile = self._tiles.get(key)
+        if tile is None:
+            with self._lock:
+                tile = self._tiles.get(key)
+                if tile is None:
+                    tile = self._tiles[key] = self._load(name, width, height)
+        return tile
+
+    def atlas(self, names: Sequence[str], size: Tuple[int, int]) -> np.ndarray:
+        """Stack tiles into a (len(names), height, width, 3) sprite atlas
+
+        Indexing the atlas with an array of tile indices composes a whole
+        board in one gather instead of a paste per tile.
+        """
+        key = (tuple(names), *size)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            tiles = [np.asarray(self.get(name, size)) for name in names]
+            with self._lock:
+                atlas = self._atlases.setdefault(key, np.stack(tiles))
+        return atlas
+
+    def _load(self, name: str, width: int, height: int):
+        if name in self.solids:
+            return Image.new("RGB", (width, height), self.solids[name])
+        if name not in self.sources:
+            raise KeyError(f"Tile {name} is not registered")
+        cached = self.cache_dir / f"{name}-{self.source_hash(name)}-{width}x{height}.png"
+        if cached.exists():
+            with Image.open(cached) as img:
+                return img.convert("RGB")
+        _log.info("Resizing %s to %ix%i", name, width, height)
+        with Image.open(self.sources[name]) as img:
+            tile = img.convert("RGB").resize((width, height))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tile.save(cached)
+        return tile
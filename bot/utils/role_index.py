@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Set
+
+from discord import Guild, Member
+
+from ..logs.custom_logger import BotLogger
+
+__all__ = ("RoleIndex", "GuildRoleIndex", "ROLE_INDEX")
+
+_log = BotLogger("[ROLE INDEX]")
+
+
+class RoleIndex:
+    """Role id to member ids of one guild
+
+    Built with one pass over the member cache, then kept up to date
+    from member events, so role queries are set algebra that costs the
+    size of the sets involved instead of the size of the guild.
+    """
+
+    def __init__(self, guild_id: int) -> None:
+        self.guild_id = guild_id
+        self.roles: Dict[int, Set[int]] = {}
+        self.members: Set[int] = set()
+        self.bots: Set[int] = set()
+
+    def build(self, members: Iterable[Member]):
+        self.roles.clear()
+        self.members.clear()
+        self.bots.clear()
+        for member in members:
+            self.add(member)
+        _log.info(
+            "Indexed %i members in %i roles of %i",
+            len(self.members),
+            len(self.roles),
+            self.guild_id,
+        )
+
+    def add(self, member: Member):
+        self.members.add(member.id)
+        if member.bot:
+            self.bots.add(member.id)
+        for role in member.roles:
+            if not role.is_default():
+                self.roles.setdefault(role.id, set()).add(member.id)
+
+    def remove(self, member: Member):
+        self.members.discard(member.id)
+        self.bots.discard(member.id)
+        for role in member.roles:
+            self._discard(role.id, member.id)
+
+    def update(self, before: Member, after: Member):
+        old = {role.id for role in before.roles}
+        new = {role.id for role in after.roles}
+        for role_id in old - new:
+            self._discard(role_id, after.id)
+        for role_id in new - old:
+            if role_id != self.guild_id:
+                self.roles.setdefault(role_id, set()).add(after.id)
+
+    def drop_role(self, role_id: int):
+        self.roles.pop(role_id, None)
+
+    def _discard(self, role_id: int, member_id: int):
+        holders = self.roles.get(role_id)
+        if holders is not None:
+            holders.discard(member_id)
+            if not holders:
+                del self.roles[role_id]
+
+    def holders(self, role_id: int) -> Set[int]:
+        """Member ids holding a role, @everyone is every member"""
+        if role_id == self.guild_id:
+            return self.members
+        return self.roles.get(role_id, set())
+
+    def query(
+        self, role_id: int, without: Iterable[int] = (), bots: bool = True
+    ) -> Set[int]:
+        """Members with `role_id` and none of the roles in `without`"""
+        found = set(self.holders(role_id))
+        for role in without:
+            found -= self.holders(role)
+        if not bots:
+            found -= self.bots
+        return found
+
+
+class GuildRoleIndex:
+    """A RoleIndex per guild, built from the member cache on first use"""
+
+    def __init__(self) -> None:
+        self.guilds: Dict[int, RoleIndex] = {}
+
+    def build(self, guild: Guild):
+        index = self.guilds.get(guild.id)
+        if index is None:
+            index = self.guilds[guild.id] = RoleIndex(guild.id)
+        index.build(guild.members)
+        return index
+
+    def of(self, guild: Guild) -> RoleIndex:
+        index = self.guilds.get(guild.id)
+        return index if index is not None else self.build(guild)
+
+    def query(
+        self,
+        guild: Guild,
+        role_id: int,
+        without: Iterable[int] = (),
+        bots: bool = True,
+    ):
+        return self.of(guild).query(role_id, without, bots)
+
+    def resolve(self, guild: Guild, member_ids: Iterable[int]):
+        """Members of the ids that are still in the guild cache"""
+        for member_id in member_ids:
+            member = guild.get_member(member_id)
+            if member:
+                yield member
+
+
+ROLE_INDEX = GuildRoleIndex()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict
+
+import discord
+
+from ..logs.custom_logger import BotLogger
+
+__all__ = ("MessageRouter", "ROUTER")
+
+Handler = Callable[[discord.Message], Awaitable[Any]]
+_log = BotLogger("[ROUTER]")
+
+
+class MessageRouter:
+    """Hands a message to the one handler registered for its channel
+
+    Games and mails register their channel while they run, direct
+    messages go to a single DM handler. Any other message costs a dict
+    lookup instead of a pass through every cog's on_message.
+    """
+
+    def __init__(self) -> None:
+        self.channels: Dict[int, Handler] = {}
+        self.dm_handler: Handler | None = None
+
+    def register(self, channel_id: int, handler: Handler):
+        current = self.channels.get(channel_id)
+        if current is not None and current != handler:
+            _log.warning("Replacing the message handler of %i", channel_id)
+        self.channels[channel_id] = handler
+
+    def unregister(self, channel_id: int, handler: Handler | None = None):
+        """Remove a channel, only if it still belongs to `handler` when given"""
+        if handler is None or self.channels.get(channel_id) == handler:
+            self.channels.pop(channel_id, None)
+
+    async def dispatch(self, message: discord.Message):
+        if message.author.bot:
+            return
+        if message.guild is None:
+            handler = self.dm_handler
+        else:
+            handler = self.channels.get(message.channel.id)
+        if handler is not None:
+            await handler(message)
+
+
+ROUTER = MessageRouter()
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Set
+
+from ..logs.custom_logger import BotLogger
+
+__all__ = ("DeadlineScheduler", "Timer", "SCHEDULER")
+
+_log = BotLogger("[SCHEDULER]")
+
+
+class _Entry:
+    __slots__ = ("when", "seq", "timer")
+
+    def __init__(self, when: float, seq: int, timer: Timer) -> None:
+        self.when = when
+        self.seq = seq
+        self.timer = timer
+
+    def __lt__(self, other: _Entry):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+    @property
+    def live(self):
+        return self.timer._entry is self  # pylint: disable=protected-access
+
+
+class Timer:
+    """Handle returned by the scheduler, used to cancel or move a deadline"""
+
+    __slots__ = ("scheduler", "callback", "name", "_entry")
+
+    def __init__(
+        self,
+        scheduler: DeadlineScheduler,
+        callback: Callable[[], Awaitable[Any] | Any],
+        name: str,
+    ) -> None:
+        self.scheduler = scheduler
+        self.callback = callback
+        self.name = name
+        self._entry: Optional[_Entry] = None
+
+    @property
+    def active(self):
+        return self._entry is not None
+
+    @property
+    def remaining(self):
+        if not self._entry:
+            return 0.0
+        return max(self._entry.when - time.monotonic(), 0.0)
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+    def reschedule(self, deadline: datetime | float):
+        self.scheduler.reschedule(self, deadline)
+
+
+class DeadlineScheduler:
+    """One task firing every deadline of the bot from a min-heap
+
+    Deadlines are kept on the monotonic clock. Cancelled or moved
+    timers leave a stale heap entry behind which is skipped on pop,
+    the heap is rebuilt once stale entries outnumber live ones.
+    """
+
+    def __init__(self, history: int = 256) -> None:
+        self._heap: List[_Entry] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._callbacks: Set[asyncio.Task] = set()
+        self.fired = 0
+        self.lateness: Deque[float] = deque(maxlen=history)
+        self.max_lateness = 0.0
+
+    @staticmethod
+    def to_monotonic(deadline: datetime | float):
+        """Convert a wall clock deadline or a delay in seconds"""
+        if isinstance(deadline, datetime):
+            deadline = (deadline - datetime.now()).total_seconds()
+        return time.monotonic() + deadline
+
+    @property
+    def pending(self):
+        return self._active
+
+    def stats(self):
+        avg = sum(self.lateness) / len(self.lateness) if self.lateness else 0.0
+        return {
+            "pending": self._active,
+            "heap": len(self._heap),
+            "fired": self.fired,
+            "avg_lateness": avg,
+            "max_lateness": self.max_lateness,
+        }
+
+    def call_at(
+        self,
+        deadline: datetime | float,
+        callback: Callable[[], Awaitable[Any] | Any],
+        name: str = "",
+    ):
+        """Run `callback` once `deadline` passes
+
+        Args:
+            deadline (datetime | float): wall clock deadline or delay in seconds
+            callback (Callable): function or coroutine function without arguments
+            name (str): shown in logs
+
+        Returns:
+            Timer: handle to cancel or reschedule
+        """
+        timer = Timer(self, callback, name)
+        self._push(timer, self.to_monotonic(deadline))
+        return timer
+
+    def cancel(self, timer: Timer):
+        if timer._entry is None:  # pylint: disable=protected-access
+            return
+        timer._entry = None  # pylint: disable=protected-access
+        self._active -= 1
+        if len(self._heap) > 64 and len(self._heap) > 2 * self._active:
+            self._heap = [entry for entry in self._heap if entry.live]
+            heapq.heapify(self._heap)
+
+    def reschedule(self, timer: Timer, deadline: datetime | float):
+        self.cancel(timer)
+        self._push(timer, self.to_monotonic(deadline))
+
+    def _push(self, timer: Timer, when: float):
+        entry = _Entry(when, next(self._seq), timer)
+        timer._entry = entry  # pylint: disable=protected-access
+        self._active += 1
+        heapq.heappush(self._heap, entry)
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        elif self._heap[0] is entry and self._wakeup:
+            self._wakeup.set()
+
+    def _fire(self, entry: _Entry, now: float):
+        timer = entry.timer
+        timer._entry = None  # pylint: disable=protected-access
+        self._active -= 1
+        self.fired += 1
+        late = now - entry.when
+        self.lateness.append(late)
+        self.max_lateness = max(self.max_lateness, late)
+        try:
+            result = timer.callback()
+            if asyncio.iscoroutine(result):
+                task = asyncio.create_task(result, name=timer.name or None)
+                self._callbacks.add(task)
+                task.add_done_callback(self._finished)
+        except Exception:  # pylint: disable=broad-exception-caught
+            _log.exception("Timer %s failed", timer.name)
+
+    def _finished(self, task: asyncio.Task):
+        self._callbacks.discard(task)
+        if not task.cancelled() and task.exception():
+            _log.error("Timer %s failed", task.get_name(), exc_info=task.exception())
+
+    async def _run(self):
+        assert self._wakeup is not None
+        while True:
+            now = time.monotonic()
+            while self._heap:
+                entry = self._heap[0]
+                live = entry.live
+                if live and entry.when > now:
+                    break
+                heapq.heappop(self._heap)
+                if live:
+                    self._fire(entry, now)
+            if not self._heap:
+                self._task = None
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self._heap[0].when - time.monotonic()
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+SCHEDULER = DeadlineScheduler()
@@ -1,22 +1,25 @@
+import asyncio
 import os
 
-import httpx
 from dotenv import load_dotenv
 
 from bot import NhCord
+from bot.utils.assets import AssetCache
 
 # pylint: disable=line-too-long
 BROKEN_IMG = "https://wallpaperaccess.com/full/1166633.jpg"
 SAFE_IMG = "https://st3.depositphotos.com/1031174/15354/i/600/depositphotos_153541450-stock-photo-glass-texture-background.jpg"
+ASSETS = [
+    (BROKEN_IMG, "bot/glass_broken.jpg"),
+    (SAFE_IMG, "bot/glass_safe.jpg"),
+]
 
 if __name__ == "__main__":
     load_dotenv()
-    with open("bot/glass_broken.jpg", "wb") as file:
-        resp = httpx.get(BROKEN_IMG)
-        file.write(resp.read())
-    with open("bot/glass_safe.jpg", "wb") as file:
-        resp = httpx.get(SAFE_IMG)
-        file.write(resp.read())
+    # the bot reuses this loop, so it must stay open after fetching
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(AssetCache().ensure(ASSETS))
 
     bot = NhCord()
     bot.run(os.getenv("LIVETOKEN"))
@@ -0,0 +1,63 @@
+"""Replay or summarize the minigame event log
+
+Run from the repository root, the bot package and its config are not
+loaded, only the record format:
+    python scripts/game_events.py games
+    python scripts/game_events.py replay <game id>
+    python scripts/game_events.py stats [--game bridge|redgreen]
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+FORMAT = Path(__file__).parent.parent / "bot/utils/minigames/event_format.py"
+
+
+def _load_format():
+    spec = importlib.util.spec_from_file_location("event_format", FORMAT)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv: List[str] | None = None):
+    fmt = _load_format()
+    parser = argparse.ArgumentParser(description="Replay or summarize minigame logs")
+    parser.add_argument("--path", type=Path, default=fmt.EVENT_LOG)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("games", help="list recorded games")
+    replay = commands.add_parser("replay", help="print every event of a game")
+    replay.add_argument("game", type=int)
+    stats = commands.add_parser("stats", help="aggregate over every game")
+    stats.add_argument("--game", choices=[kind.name.lower() for kind in fmt.GameKind])
+    args = parser.parse_args(argv)
+
+    reader = fmt.EventReader(args.path)
+    if args.command == "games":
+        for record in reader.games():
+            stamp = datetime.fromtimestamp(record.time).isoformat(" ", "seconds")
+            print(
+                f"{record.game:>20} {record.kind.name.lower():<9} {stamp} "
+                + f"channel={record.member} players={record.value}"
+            )
+    elif args.command == "replay":
+        records = reader.game(args.game)
+        if not records:
+            parser.exit(1, f"no events for game {args.game}\n")
+        for record in records:
+            print(record)
+    else:
+        kind = fmt.GameKind[args.game.upper()] if args.game else None
+        for name, value in reader.stats(kind).items():
+            print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()